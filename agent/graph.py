@@ -11,18 +11,17 @@ from agent.nodes.retrieve import retrieve_context_node
 from agent.nodes.actualize import actualize_context_node
 from agent.nodes.generate_learn_response import generate_learn_response_node
 from agent.nodes.generate_solve_response import generate_solve_response_node
-from agent.nodes.index_raw import index_raw_node
-from agent.nodes.actualize import actualize_context_node
+from agent.nodes.index_raw import extract_brief_fact_node, index_raw_node
 
 logger = logging.getLogger(__name__)
 
 
-def route_after_classify(state: AgentState) -> str:
+def route_after_classify(state: AgentState) -> str | list[str]:
     """
     Route after classify based on presence of memory_updates and intent.
     
     Flow:
-    - Has memory_updates? -> process_memory (then check intent)
+    - Has memory_updates? -> process_memory + brief_fact in parallel (then check intent)
     - No memory_updates + solve intent? -> solve_direct (skip to retrieval)
     - No memory_updates + learn intent? -> learn_only (shouldn't happen, but handle)
     """
@@ -34,7 +33,7 @@ def route_after_classify(state: AgentState) -> str:
     # If we have memory updates, process them first
     if memory_updates:
         logger.info("→ Routing to process_memory (knowledge_manager)")
-        return "process_memory"
+        return ["process_memory", "brief_fact"]
     
     # If pure solve (no memory updates), go directly to retrieval
     else:
@@ -64,7 +63,7 @@ def create_agent_graph():
     
     Flow:
     1. classify (orchestrator/decomposer)
-    2a. If has memory_updates -> check_conflicts -> resolve_conflicts (if needed) -> store_knowledge
+    2a. If has memory_updates -> check_conflicts || extract_brief_fact -> index_raw_facts -> generate_learn_response
     2b. Then route by intent:
         - learn only -> generate_learn_response
         - solve -> retrieve_context -> react_loop -> generate_solve_response -> validate
@@ -80,10 +79,10 @@ def create_agent_graph():
     workflow.add_node("check_conflicts", check_conflicts_node)
     workflow.add_node("query_analyzer", query_analyzer_node)
     workflow.add_node("retrieve_context", retrieve_context_node)
-    # workflow.add_node("actualize_context", actualize_context_node)
     workflow.add_node("react_loop", context_answer_node)
     workflow.add_node("generate_solve_response", generate_solve_response_node)
     workflow.add_node("generate_learn_response", generate_learn_response_node)
+    workflow.add_node("extract_brief_fact", extract_brief_fact_node)
     workflow.add_node("index_raw_facts", index_raw_node)
     workflow.add_node("actualize_context", actualize_context_node)
 
@@ -97,17 +96,14 @@ def create_agent_graph():
         route_after_classify,
         {
             "process_memory": "check_conflicts",  # Start with conflict check
+            "brief_fact": "extract_brief_fact",  # Summarize in parallel with conflict check
             "solve_direct": "query_analyzer",  # Analyze query before retrieval
         }
     )
     logger.debug("Added conditional routing from classify")
 
-    # Memory processing chain: check_conflicts → index_facts → store_indexed_fact → learn response
-    # workflow.add_edge("check_conflicts", "index_facts")
-    # workflow.add_edge("index_facts", "store_indexed_facts")
-    # logger.debug("Added memory processing chain")
-    # workflow.add_edge("store_indexed_facts", "generate_learn_response")
-    workflow.add_edge("check_conflicts", "index_raw_facts")
+    # index_raw waits for both the conflict check and the brief fact
+    workflow.add_edge(["check_conflicts", "extract_brief_fact"], "index_raw_facts")
     workflow.add_edge("index_raw_facts", "generate_learn_response")
     # After store_knowledge: route by intent
     workflow.add_conditional_edges(
@@ -126,8 +122,6 @@ def create_agent_graph():
     workflow.add_edge("actualize_context", "react_loop")
     workflow.add_edge("react_loop", "generate_solve_response")
     workflow.add_edge("generate_solve_response", END)
-    # workflow.add_edge("validate_response", END)
-    workflow.add_edge("generate_learn_response", END)
 
     logger.debug("Added solve path edges")
 
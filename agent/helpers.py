@@ -3,12 +3,114 @@ Helper functions для agent nodes.
 Provides utility functions for ReAct reasoning, conflict detection, and message lookups.
 """
 
+import asyncio
 import logging
-from typing import Optional, Tuple
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+from langchain_core.runnables import RunnableConfig
+
 from clients.llm_client import get_llm_client
 
 logger = logging.getLogger(__name__)
 
+
+def get_stream_sink(config: Optional[RunnableConfig]) -> Optional[asyncio.Queue]:
+    """
+    Return the token sink passed as config={"configurable": {"stream_sink": queue}}.
+
+    Nodes put (node_name, chunk) tuples into it; chunks tagged
+    "generate_solve_response" make up the final answer.
+    """
+    return ((config or {}).get("configurable") or {}).get("stream_sink")
+
+
+async def stream_to_sink(
+    sink: asyncio.Queue, source: str, messages: List[Dict[str, Any]], **kwargs
+) -> str:
+    """Stream an LLM answer into sink as (source, chunk) while collecting the full text."""
+    chunks: List[str] = []
+    async for token in get_llm_client().stream_async(messages=messages, **kwargs):
+        chunks.append(token)
+        await sink.put((source, token))
+    return "".join(chunks)
+
+
+@lru_cache(maxsize=128)
+def ukr_fact_word(n: int) -> str:
+    """
+    Ukrainian plural form of "факт" for a count: 1 факт, 2 факти, 5 фактів.
+
+    11-14 always take "фактів" (11 фактів, but 21 факт, 22 факти).
+    """
+    n = abs(n)
+    if 11 <= n % 100 <= 14:
+        return "фактів"
+    last = n % 10
+    if last == 1:
+        return "факт"
+    if 2 <= last <= 4:
+        return "факти"
+    return "фактів"
+
+
+def _find_json_span(text: str) -> Optional[Tuple[int, int]]:
+    """
+    Locate the first balanced JSON object or array in text.
+
+    One linear pass tracking bracket depth; brackets inside string literals
+    (including escaped quotes) are ignored. Returns (start, end) slice bounds
+    or None if no balanced value is found.
+    """
+    start = -1
+    depth = 0
+    in_string = False
+    escaped = False
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            if start >= 0:
+                in_string = True
+        elif char in "{[":
+            if start < 0:
+                start = i
+            depth += 1
+        elif char in "}]" and start >= 0:
+            depth -= 1
+            if depth == 0:
+                return start, i + 1
+    return None
+
+
+def parse_llm_json(text: str) -> Any:
+    """
+    Parse JSON from an LLM reply with orjson, tolerating ```json code fences
+    and prose around the JSON value.
+
+    Raises:
+        orjson.JSONDecodeError (a ValueError subclass) if the reply is not JSON
+    """
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.removeprefix("```json").removeprefix("```")
+        text = text.removesuffix("```").strip()
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        # "Ось відповідь: {...}" - cut out the first balanced value and parse once more
+        span = _find_json_span(text)
+        if span is None:
+            raise
+        return orjson.loads(text[span[0]:span[1]])
+
+
 def format_search_results(results: list) -> str:
     """
     Format Graphiti search results для observation в ReAct loop.
@@ -33,5 +135,5 @@ def format_search_results(results: list) -> str:
         formatted.append(f"{i}. [score: {score:.2f}] {content_preview}")
     
     result_text = "\n".join(formatted)
-    logger.debug(f"Formatted {len(results)} search results")
+    logger.debug("Formatted %d search results", len(results))
     return result_text
@@ -3,22 +3,49 @@ Node for context actualization - extracts only relevant context items based on t
 Uses brief_fact for LLM analysis, returns full facts for relevant items.
 """
 
-import json
 import logging
+from string import Template
 from typing import Dict, Any, List
 from langsmith import traceable
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from agent.state import AgentState
-from clients.llm_client import get_llm_client
+from clients.llm_client import get_llm_client, system_message
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+SYSTEM_PROMPT = """Ти експерт з аналізу релевантності інформації для виконання задач. Тобі надана задача, план її виконання та список назв фактів потенційно релевантних для виконання задачі.
+
+**ТВОЯ ЗАДАЧА:**
+Проаналізуй задачу користувача і план її виконання. Визнач за назвою, які факти ДІЙСНО релевантні для виконання поставленої задачі.
+
+**КРИТЕРІЇ РЕЛЕВАНТНОСТІ:**
+✓ Теоретичні факти що необхідні для виконання задачі
+✓ Інформація, що безпосередньо стосується запиту чи якогось з пунктів плану
+
+**КРИТЕРІЇ НЕРЕЛЕВАНТНОСТІ:**
+✗ Загальна інформація, яка не стосується даної задачі фбо конкретного пункту плану
+✗ Інформація про інші теми/алгоритми/об'єкти
+✗ Побічна інформація, яка точно не допоможе виконати задачу
+
+**ФОРМАТ ВІДПОВІДІ:**
+Поверни JSON з масивом індексів релевантних фактів:
+{"relevant_indexes": [...]}
+
+Якщо жоден факт не релевантний, поверни порожній масив: {"relevant_indexes": []}"""
+
+USER_PROMPT_TEMPLATE = Template("""Задача: $message
+
+План: $plan
+
+Факти для аналізу:
+$facts""")
+
 
 class RelevanceAnalysis(BaseModel):
     """Structured output for relevance analysis."""
-    relevant_indexes: List[int]
+    relevant_indexes: List[int] = Field(default_factory=list)
 
 
 @traceable(name="actualize_context")
@@ -48,43 +75,22 @@ async def actualize_context_node(state: AgentState) -> Dict[str, Any]:
         return {"relevant_context": []}
     
     original_count = len(retrieved_context)
-    logger.info(f"Analyzing {original_count} context items for relevance")
+    logger.info("Analyzing %d context items for relevance", original_count)
     
     # Build brief facts list for LLM
-    brief_facts_list = []
-    for i, ctx in enumerate(retrieved_context):
-        brief_fact = ctx.get("brief_fact", "") or ctx.get("content", "")[:100]
-        brief_facts_list.append(f"{i}. {brief_fact}")
-    
-    brief_facts_string = "\n".join(brief_facts_list)
+    brief_facts_string = "\n".join(
+        f"{i}. {ctx.get('brief_fact', '') or ctx.get('content', '')[:100]}"
+        for i, ctx in enumerate(retrieved_context)
+    )
     
-    # Build prompt for LLM
-    system_prompt = """Ти експерт з аналізу релевантності інформації для виконання задач. Тобі надана задача, план її виконання та список назв фактів потенційно релевантних для виконання задачі.
+    user_prompt = USER_PROMPT_TEMPLATE.substitute(
+        message=message_text,
+        plan=plan if plan else "(план відсутній)",
+        facts=brief_facts_string,
+    )
 
-**ТВОЯ ЗАДАЧА:**
-Проаналізуй задачу користувача і план її виконання. Визнач за назвою, які факти ДІЙСНО релевантні для виконання поставленої задачі.
-
-**КРИТЕРІЇ РЕЛЕВАНТНОСТІ:**
-✓ Теоретичні факти що необхідні для виконання задачі
-✓ Інформація, що безпосередньо стосується запиту чи якогось з пунктів плану
-
-**КРИТЕРІЇ НЕРЕЛЕВАНТНОСТІ:**
-✗ Загальна інформація, яка не стосується даної задачі фбо конкретного пункту плану
-✗ Інформація про інші теми/алгоритми/об'єкти
-✗ Побічна інформація, яка точно не допоможе виконати задачу
-
-**ФОРМАТ ВІДПОВІДІ:**
-Поверни JSON з масивом індексів релевантних фактів:
-{"relevant_indexes": [...]}
-
-Якщо жоден факт не релевантний, поверни порожній масив: {"relevant_indexes": []}"""
-
-    user_prompt = f"""Задача: {message_text}
-
-План: {plan if plan else "(план відсутній)"}
-
-Факти для аналізу:
-{brief_facts_string}"""
+    # Output is a JSON list of indexes: a few tokens per item at most
+    max_tokens = min(500, 32 + 4 * original_count)
 
     try:
         # Call LLM to identify relevant items
@@ -94,11 +100,11 @@ async def actualize_context_node(state: AgentState) -> Dict[str, Any]:
         try:
             result = await llm_client.generate_async(
                 messages=[
-                    {"role": "system", "content": system_prompt},
+                    system_message(SYSTEM_PROMPT),
                     {"role": "user", "content": user_prompt}
                 ],
                 temperature=0.3,
-                max_tokens=500,
+                max_tokens=max_tokens,
                 response_format=RelevanceAnalysis
             )
             relevant_indexes = result.relevant_indexes
@@ -107,32 +113,41 @@ async def actualize_context_node(state: AgentState) -> Dict[str, Any]:
             # Fallback to JSON parsing
             response = await llm_client.generate_async(
                 messages=[
-                    {"role": "system", "content": system_prompt},
+                    system_message(SYSTEM_PROMPT),
                     {"role": "user", "content": user_prompt}
                 ],
                 temperature=0.3,
-                max_tokens=500
+                max_tokens=max_tokens
             )
-            parsed = json.loads(response)
-            relevant_indexes = parsed.get("relevant_indexes", [])
+            # Parse + validate in one pydantic-core pass (no intermediate dict)
+            relevant_indexes = RelevanceAnalysis.model_validate_json(response).relevant_indexes
         
-        logger.info(f"LLM identified {len(relevant_indexes)} relevant items: {relevant_indexes}")
+        # The model sometimes lists an index twice: keep the first occurrence only
+        relevant_indexes = list(dict.fromkeys(relevant_indexes))
+        logger.debug("LLM identified %d relevant items: %s", len(relevant_indexes), relevant_indexes)
         
         # Build relevant context list with full facts
         relevant_context = []
         sources = []
+        invalid_indexes = []
         for idx in relevant_indexes:
             if 0 <= idx < len(retrieved_context):
                 ctx = retrieved_context[idx]
                 relevant_context.append({
                     "content": ctx.get("content", ""),
-                    "message_id": ctx.get("message_id", "unknown")
+                    "message_id": ctx.get("message_id", "unknown"),
+                    "score": ctx.get("score", 0.0)
                 })
                 sources.append(ctx.get("message_id", ""))
             else:
-                logger.warning(f"Invalid index {idx} from LLM (max: {len(retrieved_context)-1})")
+                invalid_indexes.append(idx)
+
+        if invalid_indexes:
+            logger.warning(
+                "Invalid indexes %s from LLM (max: %d)", invalid_indexes, len(retrieved_context) - 1
+            )
         
-        logger.info(f"Filtered context: {len(relevant_context)}/{original_count} items")
+        logger.info("Filtered context: %d/%d items", len(relevant_context), original_count)
         
         return {"relevant_context": relevant_context, "sources": sources}
         
@@ -146,7 +161,8 @@ async def actualize_context_node(state: AgentState) -> Dict[str, Any]:
         for ctx in retrieved_context:
             fallback_context.append({
                 "content": ctx.get("content", ""),
-                "message_id": ctx.get("message_id", "unknown")
+                "message_id": ctx.get("message_id", "unknown"),
+                "score": ctx.get("score", 0.0)
             })
             sources.append(ctx.get("message_id", ""))
         
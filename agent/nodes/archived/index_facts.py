@@ -1,20 +1,72 @@
 import logging
-import json
-from typing import Any, Dict, List
+import re
+from itertools import batched
+from typing import Any, Dict, List, Optional
 
-from pydantic import BaseModel, ValidationError
+from pydantic import BaseModel, ConfigDict, Field
 
 from agent.state import AgentState
-from clients.llm_client import get_llm_client
+from clients.llm_client import get_llm_client, system_message
+from clients.response_cache import ResponseCache, get_response_cache
+from config.settings import settings
 from langsmith import traceable
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on concurrent extraction requests to the LLM server
+MAX_CONCURRENT_EXTRACTIONS = 8
+
+# Batches of MAX_CONCURRENT_EXTRACTIONS sent per window
+EXTRACTION_WINDOW_BATCHES = 4
+
+# A hung extraction fails alone instead of holding up the whole batch
+EXTRACTION_TIMEOUT_S = 30.0
+
+# Short updates without examples are already a fact: no extraction call needed
+TRIVIAL_FACT_MAX_CHARS = 120
+_EXAMPLES_HINT_RE = re.compile(r"приклад|example|```|\n- ", re.IGNORECASE)
+
+SYSTEM_PROMPT = (
+    "Твоя мета - розкласти надану інформацію на короткий факт, його розгорнутий опис та приклади."
+    "Повертай ЛИШЕ валідний JSON"
+    "!!!ВАЖЛИВО!!! Використовуй лише інформацію з тексту повідомлення.Не додавай ніякої інформації, яка чітко вказана в повідомленні.Тільки прямий текст з повідомлення"
+)
+
+# The output shape is enforced by structured output (response_format), so the
+# prompt carries no schema block
+USER_PROMPT_TEMPLATE = "Повідомлення:\n{message_text}"
+
+
+def build_user_prompt(message_text: str) -> str:
+    return USER_PROMPT_TEMPLATE.format_map({"message_text": message_text})
+
 
 class FactExtraction(BaseModel):
-    fact: str
-    description: str
-    examples: str
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
+    # Descriptions travel in the JSON schema sent as response_format
+    fact: str = Field(description="факт коротко")
+    description: str = Field(
+        description="розгорнуте пояснення, заповни якщо в повідомленні є додаткове пояснення факту або визначення деталей"
+    )
+    examples: str = Field(
+        description="приклади використання факту, заповни якщо в повідомленні є приклади, точно так як і в повідомленні"
+    )
+
+
+def trivial_fact(update_text: str) -> Optional[Dict[str, Any]]:
+    """Return the extraction for a short, example-free update without the LLM, else None."""
+    if len(update_text) < TRIVIAL_FACT_MAX_CHARS and not _EXAMPLES_HINT_RE.search(update_text):
+        return {"fact": update_text.strip(), "description": "", "examples": ""}
+    return None
+
+
+def parse_fact(raw: FactExtraction | Exception) -> Dict[str, Any]:
+    """Turn one structured-output result into a fact dict (defaults if the call failed)."""
+    if isinstance(raw, Exception):
+        logger.error(f"Error extracting fact: {raw}")
+        return {"fact": None, "description": None, "examples": ""}
+    return raw.model_dump()
 
 
 @traceable(name="index_fact")
@@ -29,67 +81,65 @@ async def index_facts_node(state: AgentState) -> Dict[str, Any]:
 
     llm = get_llm_client()
 
-    system_prompt = (
-        "Твоя мета - розкласти надану інформацію на короткий факт, його розгорнутий опис та приклади."
-        "Повертай ЛИШЕ валідний JSON"
-        "!!!ВАЖЛИВО!!! Використовуй лише інформацію з тексту повідомлення.Не додавай ніякої інформації, яка чітко вказана в повідомленні.Тільки прямий текст з повідомлення"
-    )
-
-    def build_user_prompt(message_text: str) -> str:
-        return (
-            "Проаналізуй повідомлення і поверни JSON об'єкт, що точно відповідає цій схемі:\n"
-            "{\n"
-            "  \"fact\": string,               // факт коротко\n"
-            "  \"description\": string,        // розгорнуте пояснення, заповни якщо в повідомленні є додаткове пояснення факту або визначення деталей\n"
-            "  \"examples\": string            // приклади використання факту, заповни якщо в повідомленні є приклади, точно так як і в повідомленні\n"
-            "}\n"
-
-            "Правила:\n"
-            "- Виводь лише JSON, без markdown, без code fences.\n"
-            "- Використовуй лише інформацію з тексту повідомлення. Ні в якому разі не додавй нічого від себе.\n"
-
-            "Повідомлення:\n"
-            f"{message_text}"
-        )
-
-    indexed_facts = []
     memory_updates = state.get("memory_updates") or []
 
-    for update_text in memory_updates:
+    # Trivial updates skip the LLM, previously extracted ones come from the
+    # response cache; repeats in this batch are sent once
+    cache = get_response_cache() if settings.response_cache_enabled else None
+    keys = {text: ResponseCache.make_key(f"index_facts\n{text}") for text in memory_updates}
+    extracted: Dict[str, Dict[str, Any]] = {}
+    for text in keys:
+        fact = trivial_fact(text)
+        if fact is not None:
+            extracted[text] = fact
+    if cache is not None:
+        for text, key in keys.items():
+            if text in extracted:
+                continue
+            cached = cache.get(key)
+            if cached is not None:
+                extracted[text] = cached
+    pending = [text for text in keys if text not in extracted]
+    logger.debug("index_facts: %d trivial/cached, %d to extract", len(extracted), len(pending))
+
+    # Misses go out in windows of a few batches: prompts are built per window
+    # and each window's results are cached as soon as it completes
+    for window in batched(pending, MAX_CONCURRENT_EXTRACTIONS * EXTRACTION_WINDOW_BATCHES):
+        messages_list = [
+            [
+                system_message(SYSTEM_PROMPT),
+                {"role": "user", "content": build_user_prompt(update_text)},
+            ]
+            for update_text in window
+        ]
         try:
-            raw = await llm.generate_async(
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": build_user_prompt(update_text)},
-                ],
+            raw_results = await llm.generate_batch_async(
+                messages_list,
                 temperature=0.001,
+                response_format=FactExtraction,
+                max_concurrency=MAX_CONCURRENT_EXTRACTIONS,
+                timeout=EXTRACTION_TIMEOUT_S,
             )
+        except Exception as e:
+            logger.error(f"Fact extraction batch failed: {e}")
+            raw_results = [e] * len(window)
 
-            if isinstance(raw, str):
-                try:
-                    parsed = json.loads(raw)
-                except json.JSONDecodeError:
-                    logger.warning("LLM response was not valid JSON; returning defaults")
-                    parsed = {}
-            elif isinstance(raw, dict):
-                parsed = raw
-            else:
-                parsed = {}
-
-            try:
-                result = FactExtraction(**parsed)
-            except ValidationError:
-                logger.warning("Parsed response missing fields; filling defaults")
-                result = FactExtraction(
-                    fact=parsed.get("fact", ""),
-                    description=parsed.get("description", ""),
-                    examples=parsed.get("examples", "") or "",
-                )
-
-            indexed_facts.append(result.dict())
+        for text, raw in zip(window, raw_results):
+            fact = parse_fact(raw)
+            extracted[text] = fact
+            if cache is not None and not isinstance(raw, Exception) and fact.get("fact"):
+                cache.set(keys[text], fact)
 
-        except Exception as e:
-            logger.error(f"Error extracting fact: {e}", exc_info=True)
-            indexed_facts.append({"fact": None, "description": None, "examples": ""})
+    # Copies: cached dicts are shared between calls
+    indexed_facts = [dict(extracted[text]) for text in memory_updates]
+
+    result: Dict[str, Any] = {"indexed_facts": indexed_facts}
+
+    # The short fact of the message itself is its brief fact: hand it to
+    # index_raw_node so it does not summarize the same text in a second call
+    message_text = state.get("message_text", "")
+    message_fact = extracted.get(message_text, {}).get("fact")
+    if state.get("brief_fact") is None and message_fact:
+        result["brief_fact"] = message_fact
 
-    return {"indexed_facts": indexed_facts}
\ No newline at end of file
+    return result
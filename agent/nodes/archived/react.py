@@ -3,18 +3,21 @@ Node 7: ReAct Loop with Structured Output and Plugin-based Tools
 Implements ReAct (Reasoning + Acting) with clean architecture.
 """
 
+import asyncio
 import logging
+import re
 from abc import ABC, abstractmethod
 from enum import Enum
+from string import Template
 from typing import Any, Dict, List, Optional, Set
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, TypeAdapter, field_validator
 
 from agent.helpers import format_search_results
 from agent.state import AgentState
 from clients.hosted_embedder import get_embedder, HostedQwenEmbedder
 from clients.llm_client import get_llm_client
-from clients.qdrant_client import QdrantClient
+from clients.qdrant_client import QdrantClient, get_qdrant
 from config.settings import settings
 from langsmith import traceable
 
@@ -31,6 +34,12 @@ class ActionType(str, Enum):
     SEARCH = "search"
 
 
+# One alternation over all action names, matched in a single pass
+_ACTION_RE = re.compile(
+    "|".join(re.escape(action.value) for action in ActionType), re.IGNORECASE
+)
+
+
 class ReactThought(BaseModel):
     """Structured output for ReAct reasoning step."""
 
@@ -55,6 +64,16 @@ class ReactThought(BaseModel):
         max_length=200
     )
 
+    @field_validator("action", mode="before")
+    @classmethod
+    def normalize_action(cls, v: Any) -> Any:
+        """Map loose action strings ("Search", "action: answer") to an ActionType value."""
+        if isinstance(v, str) and not isinstance(v, ActionType):
+            match = _ACTION_RE.search(v)
+            if match:
+                return match.group(0).lower()
+        return v
+
     @field_validator("tool_input")
     @classmethod
     def validate_tool_input(cls, v: Optional[str], info) -> Optional[str]:
@@ -82,6 +101,10 @@ class ReactStep(BaseModel):
 # Tool System
 # ============================================================================
 
+# Compiled once: serializes a whole list of steps in a single pydantic-core pass
+_STEPS_ADAPTER = TypeAdapter(List[ReactStep])
+
+
 class ToolResult(BaseModel):
     """Result from tool execution."""
 
@@ -111,6 +134,10 @@ class Tool(ABC):
         pass
 
 
+# Separates independent queries in one search tool_input
+_QUERY_SEPARATOR = ";"
+
+
 class SearchTool(Tool):
     """Search tool for finding information in vector database."""
 
@@ -125,39 +152,57 @@ class SearchTool(Tool):
 
     @property
     def description(self) -> str:
-        return "Search for information in memory using semantic search. Input: 2-5 keywords."
+        return (
+            "Search for information in memory using semantic search. Input: 2-5 keywords; "
+            "several independent queries may be separated by ';' and are searched in parallel."
+        )
 
     async def execute(self, tool_input: str, context: Dict[str, Any]) -> ToolResult:
         """Execute search in vector database."""
-        query = tool_input.strip().lower()
+        # Several hypotheses in one step: "query one; query two"
+        queries = []
+        for query in tool_input.split(_QUERY_SEPARATOR):
+            query = query.strip()
+            if query and query.lower() not in self.searched_queries:
+                self.searched_queries.add(query.lower())
+                queries.append(query)
 
         # Check for duplicate queries
-        if query in self.searched_queries:
+        if not queries:
             return ToolResult(
                 success=False,
                 observation=f"Query '{tool_input}' already used. Try different keywords."
             )
 
-        self.searched_queries.add(query)
-
         try:
-            # Generate embedding for search query
-            query_vector = await self.embedder.embed(tool_input)
-            logger.info(f"Generated embedding for query: '{tool_input}'")
-
-            # Search in Qdrant
-            search_results = await self.qdrant.search_similar(
-                query_vector=query_vector,
-                top_k=3,
-                only_relevant=True,
-            )
-
-            # Format results
+            # Generate embeddings for search queries
+            if len(queries) == 1:
+                query_vectors = [await self.embedder.embed(queries[0])]
+            else:
+                query_vectors = await self.embedder.create_batch(queries)
+            logger.debug("Generated embeddings for queries: %s", queries)
+
+            # Search in Qdrant, one request per query in flight at once
+            hits_per_query = await asyncio.gather(*(
+                self.qdrant.search_similar(
+                    query_vector=query_vector,
+                    top_k=3,
+                    only_relevant=True,
+                )
+                for query_vector in query_vectors
+            ))
+
+            # Format results (a fact found by several queries is kept once)
             formatted_results = []
-            for hit in search_results:
+            seen_contents: Set[str] = set()
+            for hit in (hit for hits in hits_per_query for hit in hits):
                 payload = hit.get("payload") or {}
+                content = payload.get("fact") or ""
+                if content in seen_contents:
+                    continue
+                seen_contents.add(content)
                 formatted_results.append({
-                    "content": payload.get("fact") or "",
+                    "content": content,
                     "score": hit.get("score", 0.0),
                     "source_msg_uid": (
                         payload.get("messageid") or
@@ -168,7 +213,7 @@ class SearchTool(Tool):
                 })
 
             observation = format_search_results(formatted_results)
-            logger.info(f"Found {len(formatted_results)} results for query '{tool_input}'")
+            logger.debug("Found %d results for queries %s", len(formatted_results), queries)
 
             return ToolResult(
                 success=True,
@@ -223,19 +268,72 @@ class ToolRegistry:
 # Prompt Building
 # ============================================================================
 
+# Static instructions first and per-step data last, so every iteration (and
+# every run with the same tools) shares one prompt prefix on the LLM server
+_THOUGHT_PROMPT_PREFIX = """🚫 TABULA RASA: У тебе НУЛЬОВІ знання про предметну область.
+Для вирішення задачі від користувача використовуй ТІЛЬКИ інформацію з контексту нижче. НЕ використовуй pretrained knowledge.
+
+ДОСТУПНІ ІНСТРУМЕНТИ:
+$tools_description
+
+Щоб використати інструмент, встанови action відмінним від "answer" і вкажи:
+- tool_name: назва інструменту
+- tool_input: конкретний вхід для інструменту
+
+ПРАВИЛА:
+- Якщо в контексті Є достатня інформація → action="answer"
+- Якщо в контексті НЕМАЄ потрібної інформації → обери відповідний інструмент
+- tool_input має бути конкретним (2-5 ключових слів для пошуку), НЕ повним реченням
+- НЕ повторюй попередні запити, шукай щось нове
+- Якщо інструмент не дав результатів, спробуй інший підхід або відповідай з наявним контекстом
+- Кінцевою відповіддю має бути виконане завдання або знайдена відповідь на питання від користувача.
+
+ПРИКЛАДИ:
+{"thought": "В контексті немає інформації про столицю", "action": "search", "tool_name": "search", "tool_input": "столиця України"}
+{"thought": "Контекст містить відповідь про Київ", "action": "answer"}
+{"thought": "Треба дізнатись про улюблену їжу", "action": "search", "tool_name": "search", "tool_input": "улюблена їжа користувача"}
+"""
+
+_THOUGHT_PROMPT_SUFFIX = """
+Завдання: $task
+
+Твоя відповідь (JSON з полями thought, action, tool_name?, tool_input?):"""
+
+# First iteration - no history
+_INITIAL_THOUGHT_TEMPLATE = Template(_THOUGHT_PROMPT_PREFIX + """
+Контекст з пам'яті (що тебе навчили):
+$context
+""" + _THOUGHT_PROMPT_SUFFIX)
+
+# Subsequent iterations - include history
+_LOOP_THOUGHT_TEMPLATE = Template(_THOUGHT_PROMPT_PREFIX + """
+Попередні кроки:
+$history
+
+Поточний контекст (що тебе навчили):
+$context
+""" + _THOUGHT_PROMPT_SUFFIX)
+
+
 class PromptBuilder:
     """Builds prompts for ReAct agent."""
 
     @staticmethod
-    def build_context_text(retrieved_context: List[Dict[str, Any]]) -> str:
-        """Format retrieved context for prompt."""
-        if not retrieved_context:
+    def format_context_item(ctx: Dict[str, Any]) -> str:
+        """Format one retrieved context item as a prompt line."""
+        return f"(message_uid={ctx.get('source_msg_uid', 'unknown')}): {ctx.get('content', '')}"
+
+    @staticmethod
+    def join_context_lines(context_lines: List[str]) -> str:
+        """Join formatted context lines into the prompt's context section."""
+        if not context_lines:
             return "(порожньо - нічого не навчили)"
+        return "\n".join(context_lines)
 
-        return "\n".join(
-            f"(message_uid={ctx.get('source_msg_uid', 'unknown')}): {ctx.get('content', '')}"
-            for i, ctx in enumerate(retrieved_context)
-        )
+    @classmethod
+    def build_context_text(cls, retrieved_context: List[Dict[str, Any]]) -> str:
+        """Format retrieved context for prompt."""
+        return cls.join_context_lines([cls.format_context_item(ctx) for ctx in retrieved_context])
 
     @staticmethod
     def build_history_text(steps: List[ReactStep]) -> str:
@@ -243,25 +341,24 @@ class PromptBuilder:
         if not steps:
             return "(немає попередніх кроків)"
 
-        history_lines = []
+        # Pieces go into one list and are copied once by the final join
+        parts: List[str] = []
+        extend = parts.extend
         for step in steps:
-            history_lines.append(
-                f"Крок {step.iteration}:\n"
-                f"  Думка: {step.thought}\n"
-                f"  Дія: {step.action.value}"
-            )
+            extend(("Крок ", str(step.iteration), ":\n  Думка: ", step.thought,
+                    "\n  Дія: ", step.action.value))
             if step.tool_name:
-                history_lines.append(f"  Інструмент: {step.tool_name}")
+                extend(("\n  Інструмент: ", step.tool_name))
             if step.tool_input:
-                history_lines.append(f"  Вхід: {step.tool_input}")
+                extend(("\n  Вхід: ", step.tool_input))
 
             # Truncate long observations
             obs = step.observation
             if len(obs) > 200:
                 obs = obs[:200] + "..."
-            history_lines.append(f"  Результат: {obs}\n")
+            extend(("\n  Результат: ", obs, "\n\n"))
 
-        return "\n".join(history_lines)
+        return "".join(parts)[:-1]
 
     @staticmethod
     def build_thought_prompt(
@@ -272,64 +369,13 @@ class PromptBuilder:
         iteration: int
     ) -> str:
         """Build prompt for generating next ReAct step."""
-
-        base_instructions = """🚫 TABULA RASA: У тебе НУЛЬОВІ знання про предметну область.
-Для вирішення задачі від користувача використовуй ТІЛЬКИ інформацію з контексту нижче. НЕ використовуй pretrained knowledge."""
-
-        tools_section = f"""
-ДОСТУПНІ ІНСТРУМЕНТИ:
-{tools_description}
-
-Щоб використати інструмент, встанови action відмінним від "answer" і вкажи:
-- tool_name: назва інструменту
-- tool_input: конкретний вхід для інструменту
-"""
-
-        rules = """
-ПРАВИЛА:
-- Якщо в контексті Є достатня інформація → action="answer"
-- Якщо в контексті НЕМАЄ потрібної інформації → обери відповідний інструмент
-- tool_input має бути конкретним (2-5 ключових слів для пошуку), НЕ повним реченням
-- НЕ повторюй попередні запити, шукай щось нове
-- Якщо інструмент не дав результатів, спробуй інший підхід або відповідай з наявним контекстом
-- Кінцевою відповіддю має бути виконане завдання або знайдена відповідь на питання від користувача.
-"""
-
-        examples = """
-ПРИКЛАДИ:
-{"thought": "В контексті немає інформації про столицю", "action": "search", "tool_name": "search", "tool_input": "столиця України"}
-{"thought": "Контекст містить відповідь про Київ", "action": "answer"}
-{"thought": "Треба дізнатись про улюблену їжу", "action": "search", "tool_name": "search", "tool_input": "улюблена їжа користувача"}
-"""
-
-        if iteration == 0:
-            # First iteration - no history
-            return f"""{base_instructions}
-
-Контекст з пам'яті (що тебе навчили):
-{context_text}
-
-Завдання: {task}
-{tools_section}
-{rules}
-{examples}
-
-Твоя відповідь (JSON з полями thought, action, tool_name?, tool_input?):"""
-
-        # Subsequent iterations - include history
-        return f"""{base_instructions}
-
-Попередні кроки:
-{history_text}
-
-Поточний контекст (що тебе навчили):
-{context_text}
-
-Завдання: {task}
-{tools_section}
-{rules}
-
-Твоя відповідь (JSON з полями thought, action, tool_name?, tool_input?):"""
+        template = _INITIAL_THOUGHT_TEMPLATE if iteration == 0 else _LOOP_THOUGHT_TEMPLATE
+        return template.substitute(
+            tools_description=tools_description,
+            history=history_text,
+            context=context_text,
+            task=task,
+        )
 
 
 # ============================================================================
@@ -421,13 +467,19 @@ class ReactAgent:
         steps: List[ReactStep] = []
         retrieved_context = initial_context.copy()
 
+        # Tools are fixed for the run and the context only changes after a search:
+        # format both once; new hits only format their own lines, and the text is
+        # joined once per iteration that added any
+        tools_desc = self.tools.get_tools_description()
+        format_item = self.prompt_builder.format_context_item
+        context_lines = [format_item(ctx) for ctx in retrieved_context]
+        context_text = self.prompt_builder.join_context_lines(context_lines)
+
         for iteration in range(self.max_iterations):
             logger.info(f"\n--- ReAct Iteration {iteration + 1}/{self.max_iterations} ---")
 
-            # Build prompt
-            context_text = self.prompt_builder.build_context_text(retrieved_context)
-            history_text = self.prompt_builder.build_history_text(steps)
-            tools_desc = self.tools.get_tools_description()
+            # Build prompt (the first iteration has no history)
+            history_text = self.prompt_builder.build_history_text(steps) if steps else ""
 
             prompt = self.prompt_builder.build_thought_prompt(
                 task=task,
@@ -456,8 +508,8 @@ class ReactAgent:
                 context={"retrieved_context": retrieved_context}
             )
 
-            # Create step record
-            step = ReactStep(
+            # Create step record (fields come from the validated ReactThought/ToolResult)
+            step = ReactStep.model_construct(
                 iteration=iteration + 1,
                 thought=thought.thought,
                 action=thought.action,
@@ -471,6 +523,8 @@ class ReactAgent:
             # Update context if tool returned data
             if result.data and isinstance(result.data, list):
                 retrieved_context.extend(result.data)
+                context_lines.extend(format_item(ctx) for ctx in result.data)
+                context_text = self.prompt_builder.join_context_lines(context_lines)
 
             # Stop if action is answer or tool failed critically
             if thought.action == ActionType.ANSWER:
@@ -511,8 +565,7 @@ async def react_loop_node(state: AgentState) -> Dict[str, Any]:
     # Initialize clients
     llm = get_llm_client()
     embedder = get_embedder()
-    qdrant = QdrantClient()
-    await qdrant.initialize()
+    qdrant = await get_qdrant()
 
     # Setup tool registry
     tool_registry = ToolRegistry()
@@ -537,19 +590,8 @@ async def react_loop_node(state: AgentState) -> Dict[str, Any]:
 
     steps, updated_context = await agent.run(task, actualized_context)
 
-    # Convert steps to dict format for state
-    steps_dict = [
-        {
-            "iteration": step.iteration,
-            "thought": step.thought,
-            "action": step.action.value,
-            "tool_name": step.tool_name,
-            "tool_input": step.tool_input,
-            "observation": step.observation,
-            "success": step.success
-        }
-        for step in steps
-    ]
+    # Convert steps to dict format for state (enum actions become their values)
+    steps_dict = _STEPS_ADAPTER.dump_python(steps, mode="json")
 
     return {
         "react_steps": steps_dict,
@@ -12,7 +12,7 @@ from langchain_core.tools import tool
 from agent.state import AgentState
 from clients.hosted_embedder import get_embedder
 from clients.llm_client import get_llm_client
-from clients.qdrant_client import QdrantClient
+from clients.qdrant_client import QdrantClient, get_qdrant
 from langsmith import traceable
 
 logger = logging.getLogger(__name__)
@@ -66,6 +66,22 @@ def create_search_tool(qdrant: QdrantClient, embedder):
     return search
 
 
+def _format_context_item(i: int, ctx: Dict[str, Any]) -> str:
+    """Format one context item as a numbered fact with optional description, examples and source."""
+    content = ctx.get("content", "") or ctx.get("fact", "")
+    description = ctx.get("description", "")
+    examples = ctx.get("examples", [])
+    source = ctx.get("source_msg_uid") or ctx.get("messageid") or "unknown"
+
+    lines = [f"{i}. Факт: {content}"]
+    if description:
+        lines.append(f"   Опис: {description}")
+    if examples and isinstance(examples, list):
+        lines.append(f"   Приклади: {', '.join(examples)}")
+    lines.append(f"   [джерело: {source}]")
+    return "\n".join(lines)
+
+
 @traceable(name="react_simple")
 async def react_simple_node(state: AgentState) -> Dict[str, Any]:
     """
@@ -83,31 +99,16 @@ async def react_simple_node(state: AgentState) -> Dict[str, Any]:
     llm_client = get_llm_client()
     llm = llm_client.get_langchain_llm()
     embedder = get_embedder()
-    qdrant = QdrantClient()
-    await qdrant.initialize()
+    qdrant = await get_qdrant()
     
     # Get initial context
     retrieved_context = state.get("actualized_context", [])
     message_text = state["message_text"]
     
     # Format initial context
-    context_text = ""
-    if retrieved_context:
-        context_parts = []
-        for i, ctx in enumerate(retrieved_context, 1):
-            content = ctx.get("content", "") or ctx.get("fact", "")
-            description = ctx.get("description", "")
-            examples = ctx.get("examples", [])
-            source = ctx.get("source_msg_uid") or ctx.get("messageid") or "unknown"
-            
-            part = f"{i}. Факт: {content}"
-            if description:
-                part += f"\n   Опис: {description}"
-            if examples and isinstance(examples, list):
-                part += f"\n   Приклади: {', '.join(examples)}"
-            part += f"\n   [джерело: {source}]"
-            context_parts.append(part)
-        context_text = "\n\n".join(context_parts)
+    context_text = "\n\n".join(
+        _format_context_item(i, ctx) for i, ctx in enumerate(retrieved_context, 1)
+    )
     
     # Create tools
     search_tool = create_search_tool(qdrant, embedder)
@@ -149,12 +150,10 @@ async def react_simple_node(state: AgentState) -> Dict[str, Any]:
         messages = result.get("messages", [])
         
         # Build response from all messages
-        response_parts = []
-        for msg in messages:
-            if hasattr(msg, 'content'):
-                content = msg.content
-                if content and isinstance(content, str):
-                    response_parts.append(content)
+        response_parts = [
+            content for content in (getattr(msg, "content", None) for msg in messages)
+            if content and isinstance(content, str)
+        ]
         
         response = "\n\n".join(response_parts) if response_parts else "Не вдалося згенерувати відповідь"
         
@@ -174,5 +173,3 @@ async def react_simple_node(state: AgentState) -> Dict[str, Any]:
             "references": [],
             "reasoning": ""
         }
-    finally:
-        await qdrant.close()
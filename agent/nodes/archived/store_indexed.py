@@ -2,8 +2,8 @@ import logging
 from typing import Any, Dict
 
 from agent.state import AgentState
-from clients.hosted_embedder import HostedQwenEmbedder
-from clients.qdrant_client import QdrantClient
+from clients.hosted_embedder import get_embedder
+from clients.qdrant_client import get_qdrant
 from langsmith import traceable
 
 logger = logging.getLogger(__name__)
@@ -28,45 +28,41 @@ async def store_indexed_facts_node(state: AgentState) -> Dict[str, Any]:
         logger.warning("store_indexed_fact_node: no indexed_facts to store")
         return {}
 
-    embedder = HostedQwenEmbedder()
-    qdrant = await QdrantClient().initialize()
+    embedder = get_embedder()
+    qdrant = await get_qdrant()
     
-    stored_count = 0
-    last_vector = None
-    
-    try:
-        for indexed in indexed_facts:
-            fact_text = indexed.get("fact") or ""
-            description = indexed.get("description")
-            examples = indexed.get("examples")
-
-            if not fact_text:
-                logger.warning("Skipping indexed fact with empty fact field")
-                continue
-
-            vector = await embedder.create(description)
-            last_vector = vector
+    facts_to_store = []
+    seen_facts = set()
+    for indexed in indexed_facts:
+        if not indexed.get("fact"):
+            logger.warning("Skipping indexed fact with empty fact field")
+            continue
+        # Repeated updates extract to the same fact: store it once
+        key = (indexed["fact"], indexed.get("description"))
+        if key in seen_facts:
+            continue
+        seen_facts.add(key)
+        facts_to_store.append(indexed)
 
-            await qdrant.insert_record(
-                vector=vector,
-                fact=fact_text,
-                message_id=state.get("message_uid", ""),
-                is_relevant=True,
-                payload={"description": description, "examples": examples},
-            )
-            
-            stored_count += 1
-            logger.info(
-                f"Stored indexed fact {stored_count} in Qdrant",
-                extra={
-                    "message_id": state.get("message_uid"),
-                    "fact": fact_text[:50],
-                    "has_description": bool(description),
-                    "examples_count": len(examples) if isinstance(examples, list) else 0,
-                },
-            )
-    finally:
-        await qdrant.close()
+    # One embedding request and one upsert for all facts
+    vectors = await embedder.create_batch(
+        [indexed.get("description") for indexed in facts_to_store]
+    )
+    records = [
+        {
+            "vector": vector,
+            "fact": indexed["fact"],
+            "message_id": state.get("message_uid", ""),
+            "is_relevant": True,
+            "payload": {
+                "description": indexed.get("description"),
+                "examples": indexed.get("examples"),
+            },
+        }
+        for indexed, vector in zip(facts_to_store, vectors)
+    ]
+    await qdrant.insert_records(records)
+    stored_count = len(records)
 
-    logger.info(f"Stored {stored_count} indexed facts total")
+    logger.info("Stored %d indexed facts total", stored_count)
     return {}
\ No newline at end of file
@@ -1,25 +1,33 @@
 
 
+import asyncio
 import logging
-import json
+from itertools import chain
 from typing import Any, Dict, List, Tuple
 
 from langsmith import traceable
 
+from agent.helpers import parse_llm_json
 from agent.state import AgentState
-from clients.qdrant_client import QdrantClient
-from clients.hosted_embedder import HostedQwenEmbedder
-from clients.llm_client import get_llm_client
+from clients.qdrant_client import QdrantClient, get_qdrant
+from clients.hosted_embedder import HostedQwenEmbedder, get_embedder
+from clients.llm_client import get_llm_client, system_message
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# Static instructions (incl. the answer format) live in the system prompt so the
+# request prefix is byte-identical across calls; only the facts go after it
+SYSTEM_PROMPT = (
+    "Ти інструмент для виявлення суперечностей.\n"
+    "Отримуєш новий факт від користувача та список раніше збережених фактів.\n"
+    "Поверни JSON зі списком record_id тих фактів, які суперечать новому факту.\n"
+    "Якщо суперечностей немає — поверни порожній список.\n"
+    "Відповідай JSON: {\"conflicts\": [\"record_id1\", \"record_id2\", ...]}"
+)
 
-def _get_embedder():
-    return HostedQwenEmbedder()
 
-
-def _extract_similar_facts(results: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+def _extract_similar_facts(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     similar_facts = []
     for item in results:
         payload = item.get("payload") or {}
@@ -28,19 +36,182 @@ def _extract_similar_facts(results: List[Dict[str, Any]]) -> List[Dict[str, str]
         # Use record_id from payload if available, otherwise use the Qdrant point ID
         record_id = payload.get("record_id") or str(item.get("id"))
         if fact and record_id:
-            similar_facts.append({"fact": fact, "message_id": message_id, "record_id": record_id})
+            similar_facts.append({
+                "fact": fact,
+                "message_id": message_id,
+                "record_id": record_id,
+                "score": item.get("score", 0.0),
+            })
     return similar_facts
 
 
+def _normalize_fact(text: str) -> str:
+    """Case- and whitespace-insensitive form of a fact for duplicate detection."""
+    return " ".join(text.casefold().split())
+
+
+def _split_by_similarity(
+    update_text: str,
+    similar_facts: List[Dict[str, Any]],
+) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """
+    Pre-screen neighbours before the LLM check.
+
+    Returns (record_ids of restatements of the update, facts that still need the LLM).
+    Only a restatement of the same text is superseded without asking; a high
+    score alone does not tell a contradiction from a paraphrase, so the rest of
+    the high band goes to the LLM. Scores are only comparable to the threshold
+    for the cosine metric, so for other metrics every remaining neighbour does.
+    """
+    normalized_update = _normalize_fact(update_text)
+    duplicates = []
+    remaining = []
+    for item in similar_facts:
+        if _normalize_fact(item["fact"]) == normalized_update:
+            duplicates.append(item["record_id"])
+        else:
+            remaining.append(item)
+
+    if settings.qdrant_distance.lower() != "cosine":
+        return duplicates, remaining
+
+    candidates = [
+        item for item in remaining
+        if item["score"] >= settings.conflict_similarity_low
+    ]
+    return duplicates, candidates
+
+
+async def _check_conflicts_with_llm(
+    llm: Any,
+    update_text: str,
+    candidates: List[Dict[str, Any]],
+    idx: int,
+) -> List[str]:
+    """Ask the LLM which of the candidate facts contradict the new update."""
+    facts_lines = "\n".join(
+        f"- record_id={item['record_id']}: {item['fact']}" for item in candidates
+    )
+    user_prompt = (
+        f"Новий факт: \"{update_text}\"\n\n"
+        f"Збережені факти:\n{facts_lines}"
+    )
+
+    try:
+        llm_result = await llm.generate_async(
+            messages=[
+                system_message(SYSTEM_PROMPT),
+                {"role": "user", "content": user_prompt},
+            ],
+            temperature=settings.temperature,
+        )
+
+        content = llm_result if isinstance(llm_result, str) else str(llm_result)
+        try:
+            parsed = parse_llm_json(content)
+            conflicts = parsed.get("conflicts", [])
+            if not isinstance(conflicts, list):
+                conflicts = []
+        except Exception:
+            conflicts = []
+    except Exception as e:
+        logger.error(f"Conflict LLM check failed for update {idx}: {e}")
+        conflicts = []
+
+    return conflicts
+
+
+async def _check_single_update(
+    idx: int,
+    update_text: str,
+    embedder: HostedQwenEmbedder,
+    llm: Any,
+    qdrant: QdrantClient,
+) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+    """
+    Run the conflict check for one memory update.
+
+    Returns (conflicts, duplicates): (record_id, fact) pairs of the records marked
+    as irrelevant because they contradict the update or merely restate it.
+    """
+    # 1. Vectorize the update
+    vector = await embedder.create(update_text)
+
+    # 2. Find 3 nearest neighbors
+    results = await qdrant.search_similar(
+        query_vector=vector,
+        top_k=3,
+        only_relevant=True,
+    )
+
+    similar_facts = _extract_similar_facts(results)
+    logger.debug("Found %d similar facts for update %d", len(similar_facts), idx)
+
+    if not similar_facts:
+        return [], []
+
+    message_fact_map: Dict[str, str] = {
+        item["record_id"]: item["fact"] for item in similar_facts
+    }
+
+    # 3. Restatements of the same fact are superseded outright (the update is
+    #    stored anew), distant facts never conflict; the rest is sent to the LLM
+    duplicates, candidates = _split_by_similarity(update_text, similar_facts)
+    logger.debug(
+        "Similarity pre-screen for update %d: %d duplicates, %d for LLM check",
+        idx,
+        len(duplicates),
+        len(candidates),
+    )
+
+    conflicts = []
+    if candidates:
+        conflicts = await _check_conflicts_with_llm(llm, update_text, candidates, idx)
+
+    # 4. Mark conflicting and duplicate records as irrelevant in one request
+    to_mark: List[str] = list(duplicates)
+    for cid in conflicts:
+        if not isinstance(cid, str):
+            continue
+        cid_clean = cid.strip()
+        if not cid_clean or cid_clean in to_mark:
+            continue
+
+        if cid_clean in message_fact_map:
+            to_mark.append(cid_clean)
+        else:
+            logger.warning(
+                f"Conflict id from LLM not found in similar facts; skipping",
+                extra={"record_id": cid_clean},
+            )
+
+    if not to_mark:
+        return [], []
+
+    try:
+        marked = await qdrant.set_relevance_by_record_ids(record_ids=to_mark, is_relevant=False)
+    except Exception as e:
+        logger.error(f"Failed to mark record_ids={to_mark} as irrelevant: {e}")
+        return [], []
+
+    logger.debug("Marked record_ids=%s as irrelevant (superseded by update %d)", marked, idx)
+    return (
+        [(cid, message_fact_map[cid]) for cid in marked if cid not in duplicates],
+        [(cid, message_fact_map[cid]) for cid in marked if cid in duplicates],
+    )
+
+
 @traceable(name="check_conflicts")
 async def check_conflicts_node(state: AgentState) -> Dict[str, Any]:
     """
-    Check conflicts for each memory_update individually.
+    Check conflicts for each memory_update individually (updates run concurrently).
     For each update:
       1. Vectorize it
       2. Find 3 nearest neighbors in Qdrant
-      3. Use LLM to detect conflicts
-      4. Mark conflicting neighbors as irrelevant immediately
+      3. Pre-screen by similarity, use LLM for every neighbour that is not a restatement
+      4. Mark conflicting (and duplicate) neighbors as irrelevant immediately
+
+    Duplicates are reported separately from conflicts: the user repeated a known fact.
     """
 
     logger.info("=== Check Conflicts Node (LEARN) ===")
@@ -48,112 +219,55 @@ async def check_conflicts_node(state: AgentState) -> Dict[str, Any]:
     memory_updates = state.get("memory_updates", [])
     if not memory_updates:
         logger.info("No memory_updates to check for conflicts")
-        return {"conflicts": []}
-
-    logger.info(f"Processing {len(memory_updates)} memory update(s) for conflict check")
+        return {"conflicts": [], "duplicates": []}
 
-    embedder = _get_embedder()
-    llm = get_llm_client()
-    qdrant = await QdrantClient().initialize()
+    # Identical updates (up to case/whitespace) share one embed + search + LLM check
+    unique_updates: Dict[str, Tuple[int, str]] = {}
+    for idx, text in enumerate(memory_updates, 1):
+        unique_updates.setdefault(_normalize_fact(text), (idx, text))
 
-    total_conflicts_resolved = 0
-    all_conflicts: List[Tuple[str, str]] = []  # (record_id, fact) for reporting
+    logger.info(
+        "Processing %d unique memory update(s) for conflict check (%d total)",
+        len(unique_updates),
+        len(memory_updates),
+    )
 
-    try:
-        for idx, update_text in enumerate(memory_updates, 1):
-            logger.info(f"Checking conflicts for memory_update {idx}/{len(memory_updates)}")
+    embedder = get_embedder()
+    llm = get_llm_client()
+    qdrant = await get_qdrant()
 
-            # 1. Vectorize the update
-            vector = await embedder.create(update_text)
+    semaphore = asyncio.Semaphore(settings.conflict_check_concurrency)
 
-            # 2. Find 3 nearest neighbors
-            results = await qdrant.search_similar(
-                query_vector=vector,
-                top_k=3,
-                only_relevant=True,
-            )
+    async def _check_one(
+        idx: int, update_text: str
+    ) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+        async with semaphore:
+            logger.debug("Checking conflicts for memory_update %d/%d", idx, len(memory_updates))
+            return await _check_single_update(idx, update_text, embedder, llm, qdrant)
 
-            similar_facts = _extract_similar_facts(results)
-            logger.info("*****"*10)
+    gathered = await asyncio.gather(
+        *[_check_one(idx, text) for idx, text in unique_updates.values()],
+        return_exceptions=True,
+    )
 
-            logger.info(results)
-            logger.info("*****"*10)
-            logger.info(f"Found {len(similar_facts)} similar facts for update {idx}")
+    conflicts_list: List[List[Tuple[str, str]]] = []
+    duplicates_list: List[List[Tuple[str, str]]] = []
+    for (idx, _text), result in zip(unique_updates.values(), gathered):
+        if isinstance(result, BaseException):
+            logger.error(f"Conflict check failed for update {idx}: {result}")
+            continue
+        conflicts_list.append(result[0])
+        duplicates_list.append(result[1])
 
-            if not similar_facts:
-                continue
+    # (record_id, fact) for reporting; two updates may resolve the same record
+    all_conflicts: List[Tuple[str, str]] = list(dict.fromkeys(chain.from_iterable(conflicts_list)))
+    all_duplicates: List[Tuple[str, str]] = [
+        item for item in dict.fromkeys(chain.from_iterable(duplicates_list))
+        if item not in all_conflicts
+    ]
 
-            message_fact_map: Dict[str, str] = {
-                item["record_id"]: item["fact"] for item in similar_facts
-            }
-
-            # 3. Build prompt for conflict checking
-            facts_lines = "\n".join(
-                [
-                    f"- record_id={item['record_id']}: {item['fact']}"
-                    for item in similar_facts
-                ]
-            )
-            system_prompt = (
-                "Ти інструмент для виявлення суперечностей.\n"
-                "Отримуєш новий факт від користувача та список раніше збережених фактів.\n"
-                "Поверни JSON зі списком record_id тих фактів, які суперечать новому факту.\n"
-                "Якщо суперечностей немає — поверни порожній список."
-            )
-            user_prompt = (
-                f"Новий факт: \"{update_text}\"\n\n"
-                f"Збережені факти:\n{facts_lines}\n\n"
-                "Відповідай JSON: {\"conflicts\": [\"record_id1\", \"record_id2\", ...]}"
-            )
-            
-
-            try:
-                llm_result = await llm.generate_async(
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt},
-                    ],
-                    temperature=settings.temperature,
-                )
-                
-                content = llm_result if isinstance(llm_result, str) else str(llm_result)
-                try:
-                    parsed = json.loads(content)
-                    conflicts = parsed.get("conflicts", [])
-                    if not isinstance(conflicts, list):
-                        conflicts = []
-                except Exception:
-                    conflicts = []
-            except Exception as e:
-                logger.error(f"Conflict LLM check failed for update {idx}: {e}")
-                conflicts = []
+    logger.info(
+        "Resolved %d conflicts and %d duplicates total", len(all_conflicts), len(all_duplicates)
+    )
 
-            # 4. Mark conflicting records as irrelevant immediately
-            for cid in conflicts:
-                if not isinstance(cid, str):
-                    continue
-                cid_clean = cid.strip()
-                if not cid_clean:
-                    continue
-                
-                if cid_clean in message_fact_map:
-                    try:
-                        await qdrant.set_relevance_by_record_id(record_id=cid_clean, is_relevant=False)
-                        logger.info(f"Marked record_id={cid_clean} as irrelevant (conflict with update {idx})")
-                        total_conflicts_resolved += 1
-                        # Track for reporting
-                        all_conflicts.append((cid_clean, message_fact_map[cid_clean]))
-                    except Exception as e:
-                        logger.error(f"Failed to mark record_id={cid_clean} as irrelevant: {e}")
-                else:
-                    logger.warning(
-                        f"Conflict id from LLM not found in similar facts; skipping",
-                        extra={"record_id": cid_clean},
-                    )
-
-    finally:
-        await qdrant.close()
-
-    logger.info(f"Resolved {total_conflicts_resolved} conflicts total")
-
-    return {"conflicts": all_conflicts}
+    return {"conflicts": all_conflicts, "duplicates": all_duplicates}
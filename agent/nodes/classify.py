@@ -3,17 +3,50 @@ Node 1: Simple Intent Classification
 Determines if message is LEARN (store facts) or SOLVE (answer questions).
 """
 import logging
+import re
 from typing import Literal
 from pydantic import BaseModel, Field
 
 from agent.state import AgentState
 from agent.storage.message_store import get_message_store
-from clients.llm_client import get_llm_client
+from clients.llm_client import get_llm_client, system_message
 from langsmith import traceable
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# The classifier answers with a single word; cap generation instead of the global max_tokens
+INTENT_MAX_TOKENS = 16
+
+FEW_SHOT_SYSTEM_PROMPT = """Визнач намір повідомлення користувача:
+
+запам'ятай: Користувач надає факти, інформацію,
+Приклади:
+- "Мій улюблений колір рожевий"
+- "Запам'ятай, що Іван працює в Google"
+- "Столиця Франції - Париж"
+
+виріши: Користувач ставить запитання, просить виконати завдання або потребує щось зробити.
+Приклади:
+- "Який мій улюблений колір?"
+- "Напиши функцію на мові python для сортування списку. Умови: ..."
+- "Яка сьогодні погода?"
+- "Порахуй 2+2"
+- "Виріши наступну задачу. Задача: ..."
+
+Відповідай ТІЛЬКИ одним словом: 'запам'ятай' або 'виріши'."""
+
+COMPACT_SYSTEM_PROMPT = """Визнач намір повідомлення користувача:
+запам'ятай - користувач надає факти, інформацію;
+виріши - користувач ставить запитання або просить виконати завдання.
+Відповідай ТІЛЬКИ одним словом: 'запам'ятай' або 'виріши'."""
+
+SYSTEM_PROMPT = FEW_SHOT_SYSTEM_PROMPT if settings.prompt_few_shot else COMPACT_SYSTEM_PROMPT
+
+# Intent keywords (English or Ukrainian variants); IGNORECASE avoids a .lower() copy
+_LEARN_RE = re.compile(r"learn|запам'ятай|навчатися|навчання", re.IGNORECASE)
+_SOLVE_RE = re.compile(r"solve|вирішити|розв'язати|вирішення|виріши", re.IGNORECASE)
+
 
 class IntentClassification(BaseModel):
     """Classification of user message intent."""
@@ -39,7 +72,7 @@ async def orchestrator_node(state: AgentState) -> dict:
         raw_message=state["message_text"],
         timestamp=state["timestamp"]
     )
-    logger.info(f"Stored raw message {state['message_uid']} in message store")
+    logger.debug("Stored raw message %s in message store", state["message_uid"])
 
     message_text = state["message_text"]
     
@@ -49,49 +82,27 @@ async def orchestrator_node(state: AgentState) -> dict:
     try:
         response = await llm_client.generate_async(
             messages=[
-                {
-                    "role": "system",
-                    "content": """Визнач намір повідомлення користувача:
-
-запам'ятай: Користувач надає факти, інформацію,
-Приклади:
-- "Мій улюблений колір рожевий"
-- "Запам'ятай, що Іван працює в Google"
-- "Столиця Франції - Париж"
-
-виріши: Користувач ставить запитання, просить виконати завдання або потребує щось зробити.
-Приклади:
-- "Який мій улюблений колір?"
-- "Напиши функцію на мовы python для сортування списку. Умови: ..."
-- "Яка сьогодні погода?"
-- "Порахуй 2+2"
-- "Виріши наступну задачу. Задача: ..."
-
-Відповідай ТІЛЬКИ одним словом: 'запам'ятай' або 'виріши'."""
-                },
+                system_message(SYSTEM_PROMPT),
                 {
                     "role": "user",
                     "content": f"Повідомлення для класифікації:\n\n\"{message_text}\"\n\nЯкий це тип: 'запам'ятай' чи 'виріши'?"
                 }
             ],
-            temperature=settings.temperature
+            temperature=settings.temperature,
+            max_tokens=INTENT_MAX_TOKENS
         )
         
-        # Parse intent from response
-        intent_text = response.strip().lower()
-        
-        # Check for "learn" in English or Ukrainian variants
-        if "learn" in intent_text or "запам'ятай" in intent_text or "навчатися" in intent_text or "навчання" in intent_text:
+        # Parse intent from response (learn keywords take precedence)
+        if _LEARN_RE.search(response):
             intent = "learn"
-        # Check for "solve" in English or Ukrainian variants
-        elif "solve" in intent_text or "вирішити" in intent_text or "розв'язати" in intent_text or "вирішення" in intent_text or "виріши" in intent_text:
+        elif _SOLVE_RE.search(response):
             intent = "solve"
         else:
-            logger.warning(f"Unexpected intent response: {intent_text}, defaulting to 'learn'")
+            logger.warning("Unexpected intent response: %s, defaulting to 'learn'", response.strip()[:100])
             intent = "learn"
             
             
-        logger.info(f"Classified intent: {intent}")
+        logger.info("Classified intent: %s", intent)
         
     except Exception as e:
         logger.error(f"Intent classification failed: {e}, defaulting to 'solve'")
@@ -2,26 +2,93 @@
 Simple Context-Based Answer Node.
 Takes retrieved context and user query, returns answer based on context only.
 No tools, no ReAct loop - just a single LLM call.
+
+If the graph is invoked with config={"configurable": {"stream_sink": queue}},
+answer tokens are also pushed to that asyncio.Queue as they are generated
+(see agent.helpers.get_stream_sink).
 """
 
+import asyncio
 import logging
-from typing import Any, Dict
+from string import Template
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.runnables import RunnableConfig
 
+from agent.helpers import get_stream_sink, stream_to_sink
 from agent.state import AgentState
-from clients.llm_client import get_llm_client
+from clients.llm_client import get_llm_client, system_message
+from clients.response_cache import cached_generate
+from models.schemas import ContextAnswer
 from langsmith import traceable
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+SYSTEM_PROMPT = """Ти асистент, який відповідає ТІЛЬКИ на основі наданого контексту.
+
+🚫 ЗАБОРОНЕНО використовувати будь-які знання поза контекстом.
+✅ Відповідай ТІЛЬКИ якщо інформація є в контексті.
+
+ПРАВИЛА:
+1. Якщо відповідь є в контексті → дай відповідь
+2. Якщо відповіді НЕМАЄ в контексті → скажи "Не маю інформації про це"
+3. ОБОВ'ЯЗКОВО вказуй джерела у форматі [джерело: X]
+4. Відповідай українською мовою"""
+
+USER_PROMPT_TEMPLATE = Template("""КОНТЕКСТ:
+$context
+
+ЗАПИТАННЯ: $message
+
+Орієнтовний план виконання:
+$plan
+
+ВІДПОВІДЬ:""")
+
+# Rule 2 of the prompt makes this the only valid answer without context
+NO_CONTEXT_RESPONSE = "Не маю інформації про це."
+
+
+def _build_context_string(context_list: List[Dict[str, Any]]) -> str:
+    """
+    Format the best-scored context items into a bounded prompt block.
+
+    Drops duplicate (source, content) items, keeps the top answer_context_top_k
+    items by score, truncates each to answer_context_item_chars and stops once
+    answer_context_max_chars is used up.
+    """
+    # Identical (source, content) items would only repeat tokens in the prompt
+    unique_items: Dict[Tuple[Any, str], Dict[str, Any]] = {}
+    for ctx in context_list:
+        unique_items.setdefault((ctx.get("message_id"), ctx.get("content", "")), ctx)
+    top_items = sorted(unique_items.values(), key=lambda c: c.get("score", 0.0), reverse=True)
+    top_items = top_items[:settings.answer_context_top_k]
+
+    item_chars = settings.answer_context_item_chars
+    budget = settings.answer_context_max_chars
+    parts: List[str] = []
+    for i, ctx in enumerate(top_items, 1):
+        part = f"{i}. {ctx.get('content', '')[:item_chars]}\n[джерело: {ctx.get('message_id', 'unknown')}]"
+        budget -= len(part)
+        if budget < 0 and parts:
+            break
+        parts.append(part)
+
+    logger.debug("Formatted %d/%d context items", len(parts), len(context_list))
+    return "\n\n".join(parts)
+
 
 @traceable(name="context_answer")
-async def context_answer_node(state: AgentState) -> Dict[str, Any]:
+async def context_answer_node(
+    state: AgentState, config: Optional[RunnableConfig] = None
+) -> Dict[str, Any]:
     """
     Simple node that answers user query based on retrieved context.
     
     Args:
         state: AgentState with retrieved_context and message_text
+        config: Runnable config; configurable["stream_sink"] enables token streaming
         
     Returns:
         State update with response
@@ -32,59 +99,74 @@ async def context_answer_node(state: AgentState) -> Dict[str, Any]:
     message_text = state.get("message_text", "")
     relevant_context_list = state.get("relevant_context", [])
     plan = state.get("plan", "")
-    
-    # Format relevant_context list into string
-    if not relevant_context_list:
-        context_string = "(контекст порожній)"
-    else:
-        context_parts = []
-        for i, ctx in enumerate(relevant_context_list, 1):
-            content = ctx.get("content", "")
-            message_id = ctx.get("message_id", "unknown")
-            context_parts.append(f"{i}. {content}\n[джерело: {message_id}]")
-        context_string = "\n\n".join(context_parts)
-    
-    logger.info(f"Formatted {len(relevant_context_list)} context items")
-
-    system_prompt = """Ти асистент, який відповідає ТІЛЬКИ на основі наданого контексту.
+    sink: Optional[asyncio.Queue] = get_stream_sink(config)
 
-🚫 ЗАБОРОНЕНО використовувати будь-які знання поза контекстом.
-✅ Відповідай ТІЛЬКИ якщо інформація є в контексті.
+    # Nothing to answer from: skip the LLM round-trip
+    if not relevant_context_list:
+        logger.info("Empty context, answering without LLM call")
+        if sink is not None:
+            await sink.put(("context_answer", NO_CONTEXT_RESPONSE))
+        return {"solve_response": NO_CONTEXT_RESPONSE, "direct_answer": NO_CONTEXT_RESPONSE}
 
-ПРАВИЛА:
-1. Якщо відповідь є в контексті → дай відповідь
-2. Якщо відповіді НЕМАЄ в контексті → скажи "Не маю інформації про це"
-3. ОБОВ'ЯЗКОВО вказуй джерела у форматі [джерело: X]
-4. Відповідай українською мовою"""
+    # Format relevant_context list into string
+    context_string = _build_context_string(relevant_context_list)
 
-    user_prompt = f"""КОНТЕКСТ:
-{context_string}
+    user_prompt = USER_PROMPT_TEMPLATE.substitute(
+        context=context_string, message=message_text, plan=plan
+    )
 
-ЗАПИТАННЯ: {message_text}
+    messages = [
+        system_message(SYSTEM_PROMPT),
+        {"role": "user", "content": user_prompt}
+    ]
+    streamed = False
 
-Орієнтовний план виконання:
-{plan}
+    async def _generate() -> str | ContextAnswer:
+        nonlocal streamed
+        if sink is not None:
+            streamed = True
+            return await stream_to_sink(
+                sink, "context_answer", messages, temperature=settings.answer_temperature
+            )
+        if settings.fused_solve_answer:
+            # Direct answer in the same call saves generate_solve_response an LLM round-trip
+            try:
+                return await get_llm_client().generate_async(
+                    messages=messages,
+                    temperature=settings.answer_temperature,
+                    response_format=ContextAnswer
+                )
+            except Exception as e:
+                logger.warning(f"Structured context answer failed, falling back to text: {e}")
+        return await get_llm_client().generate_async(
+            messages=messages,
+            temperature=settings.answer_temperature
+        )
 
-ВІДПОВІДЬ:"""
+    direct_answer = None
 
     # Call LLM
-    llm_client = get_llm_client()
-    
     try:
-        response = await llm_client.generate_async(
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=settings.temperature
+        result = await cached_generate(
+            f"context_answer\n{context_string}\n{message_text}\n{plan}",
+            _generate,
         )
+        if isinstance(result, ContextAnswer):
+            response, direct_answer = result.answer, result.direct_answer
+        else:
+            response = result
+        if sink is not None and not streamed:
+            # Served from cache: hand the whole answer over as one chunk
+            await sink.put(("context_answer", response))
         
-        logger.info(f"Generated response: {response[:100]}...")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Generated response: %s...", response[:100])
         
     except Exception as e:
         logger.error(f"LLM call failed: {e}")
         response = "Помилка генерації відповіді"
     
     return {
-        "solve_response": response
+        "solve_response": response,
+        "direct_answer": direct_answer
     }
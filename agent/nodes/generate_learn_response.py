@@ -1,5 +1,6 @@
 import logging
 from typing import Dict, Any
+from agent.helpers import ukr_fact_word
 from agent.state import AgentState
 from langsmith import traceable
 
@@ -26,14 +27,18 @@ async def generate_learn_response_node(state: AgentState) -> Dict[str, Any]:
     # Get the data from state
     indexed_facts = state.get("indexed_facts", [])
     conflicts = state.get("conflicts") or []
+    duplicates = state.get("duplicates") or []
     
     response_parts = []
     
     # First part: list stored facts
     if indexed_facts:
-        fact_list = ", ".join([f'"{item.get("brief_fact", "")}"' for item in indexed_facts if item.get("brief_fact")])
-        if fact_list:
-            response_parts.append(f"Зберіг наступні факти: {fact_list}.")
+        brief_facts = [item["brief_fact"] for item in indexed_facts if item.get("brief_fact")]
+        if brief_facts:
+            fact_list = ", ".join(f'"{fact}"' for fact in brief_facts)
+            response_parts.append(
+                f"Зберіг {len(brief_facts)} {ukr_fact_word(len(brief_facts))}: {fact_list}."
+            )
         else:
             response_parts.append("Інформацію не вдалося зберегти.")
     else:
@@ -41,10 +46,15 @@ async def generate_learn_response_node(state: AgentState) -> Dict[str, Any]:
     
     # Second part: list conflicts if any
     if conflicts:
-        conflict_list = ", ".join([f'"{fact}"' for _record_id, fact in conflicts])
+        conflict_list = ", ".join(f'"{fact}"' for _record_id, fact in conflicts)
         response_parts.append(
             f"Наступні факти суперечать вхідній інформації, тому позначені як недійсні: {conflict_list}."
         )
+
+    # Third part: facts the user repeated (the stored copy was replaced, not contradicted)
+    if duplicates:
+        duplicate_list = ", ".join(f'"{fact}"' for _record_id, fact in duplicates)
+        response_parts.append(f"Ці факти вже були відомі: {duplicate_list}.")
     
     # Concatenate response parts
     response = " ".join(response_parts)
@@ -54,6 +64,7 @@ async def generate_learn_response_node(state: AgentState) -> Dict[str, Any]:
         extra={
             "indexed_facts_count": len(indexed_facts),
             "conflicts_count": len(conflicts),
+            "duplicates_count": len(duplicates),
             "response_length": len(response)
         }
     )
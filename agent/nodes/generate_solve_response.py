@@ -3,42 +3,141 @@ Node: Generate Solve Response
 Extracts the final thought/decision from ReAct steps as the response.
 """
 
+import asyncio
 import logging
 import re
-from typing import Dict, Any, List
+from string import Template
+from typing import Dict, Any, List, Optional, Tuple
+
+from langchain_core.runnables import RunnableConfig
+
+from agent.helpers import get_stream_sink, stream_to_sink
 from agent.state import AgentState
-from clients.llm_client import get_llm_client
+from clients.llm_client import get_llm_client, system_message
+from clients.response_cache import cached_generate
 from langsmith import traceable
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+SYSTEM_PROMPT = """Ти експерт з витягування прямих відповідей на запитання.
+З наданого тексту відповіді витягни ТІЛЬКИ пряму, коротку відповідь на запитання користувача.
+
+**ПРАВИЛА:**
+1. Без зайвої інформації; якщо в тексті кілька тем - лише та, що стосується запитання
+2. Зберігай всі посилання на джерела у форматі [джерело: X]
+3. Відповідай українською мовою
+"""
+
+FEW_SHOT_EXAMPLE = """
+**ПРИКЛАД:**
+Запитання: "Що любить їсти Марія?"
+Текст: "Марія - вчителька математики [джерело: 1]. Вона працює в школі №5. Марія обожнює борщ і вареники [джерело: 2]. У вільний час читає книги."
+Відповідь: "Марія обожнює борщ і вареники [джерело: 2]."
+"""
+
+if settings.prompt_few_shot:
+    SYSTEM_PROMPT += FEW_SHOT_EXAMPLE
+
+USER_PROMPT_TEMPLATE = Template("""**ЗАПИТАННЯ КОРИСТУВАЧА:**
+$message
+
+**ТЕКСТ ВІДПОВІДІ:**
+$response
+
+**ПРЯМА ВІДПОВІДЬ:**""")
+
+# Upper bound for the extraction call; scaled down for short solve_response
+EXTRACT_MAX_TOKENS = 500
+
+# Match patterns like [джерело: 1], [джерело: abc123], etc.
+_REF_RE = re.compile(r'\[джерело:\s*([^\]]+)\]', re.IGNORECASE)
+
+
+# "No information" answers from context_answer: nothing to extract. One compiled
+# alternation scans the text once (IGNORECASE, so no .lower() copy)
+_INSUFFICIENT_RE = re.compile(
+    r'\W*(?:не маю інформації|недостатньо інформації|немає інформації|не знайдено)',
+    re.IGNORECASE
+)
+
 
 def extract_references(text: str) -> List[str]:
     """Extract references from text matching [джерело: X] pattern."""
-    # Match patterns like [джерело: 1], [джерело: abc123], etc.
-    pattern = r'\[джерело:\s*([^\]]+)\]'
-    matches = re.findall(pattern, text, re.IGNORECASE)
-    
     # Deduplicate while preserving order
-    seen = set()
-    references = []
-    for ref in matches:
-        ref = ref.strip()
-        if ref and ref not in seen:
-            seen.add(ref)
-            references.append(ref)
-    
-    return references
+    stripped = (ref.strip() for ref in _REF_RE.findall(text))
+    return list(dict.fromkeys(ref for ref in stripped if ref))
+
+
+def _is_short_answer(text: str) -> bool:
+    """True if text is already a short answer (a few sentences) not worth extracting from."""
+    return len(text) < settings.solve_extract_min_chars and text.count(".") <= 3
+
+
+def _solve_result(response: str, references: List[str]) -> Dict[str, Any]:
+    """State update with the response and its references."""
+    return {"response": response, "references": references, "reasoning": ""}
+
+
+async def _extract_direct_answer(
+    message_text: str, solve_response: str, sink: Optional[asyncio.Queue]
+) -> Tuple[str, bool]:
+    """
+    Extract the direct answer from solve_response with the LLM.
+
+    Returns (answer, streamed); streamed is True when the tokens already went to
+    sink. Falls back to solve_response itself if the call fails.
+    """
+    user_prompt = USER_PROMPT_TEMPLATE.substitute(
+        message=message_text, response=solve_response
+    )
+    messages = [
+        system_message(SYSTEM_PROMPT),
+        {"role": "user", "content": user_prompt}
+    ]
+    # The direct answer is a fragment of solve_response: never needs more tokens than it
+    max_tokens = min(EXTRACT_MAX_TOKENS, 32 + len(solve_response) // 2)
+    streamed = False
+
+    async def _generate() -> str:
+        nonlocal streamed
+        if sink is not None:
+            # Final answer: forward tokens to the caller as they are decoded
+            streamed = True
+            return await stream_to_sink(
+                sink, "generate_solve_response", messages,
+                temperature=settings.answer_temperature, max_tokens=max_tokens
+            )
+        return await get_llm_client().generate_async(
+            messages=messages,
+            temperature=settings.answer_temperature,
+            max_tokens=max_tokens
+        )
+
+    try:
+        extracted_answer = await cached_generate(
+            f"solve_extract\n{message_text}\n{solve_response}",
+            _generate,
+        )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Extracted direct answer: %s...", extracted_answer[:100])
+        return extracted_answer, streamed
+    except Exception as e:
+        logger.error(f"Error extracting direct answer: {e}")
+        # Fallback to original behavior
+        return solve_response, streamed
 
 
 @traceable(name="generate_solve_response")
-async def generate_solve_response_node(state: AgentState) -> Dict[str, Any]:
+async def generate_solve_response_node(
+    state: AgentState, config: Optional[RunnableConfig] = None
+) -> Dict[str, Any]:
     """
     Генерує відповідь для SOLVE режиму, використовуючи LLM для витягування прямої відповіді.
 
     Args:
         state: Current agent state з solve_response та message_text
+        config: Runnable config; configurable["stream_sink"] receives the final answer tokens
 
     Returns:
         State update with:
@@ -51,81 +150,31 @@ async def generate_solve_response_node(state: AgentState) -> Dict[str, Any]:
     message_text = state.get("message_text", "")
     solve_response = state.get("solve_response", "")
     learn_response = state.get("learn_response", "")
+    direct_answer = state.get("direct_answer")
+    sink: Optional[asyncio.Queue] = get_stream_sink(config)
     
     if not solve_response:
         logger.warning("No solve_response available")
-        return {
-            "response": learn_response if learn_response else "Не вдалося згенерувати відповідь",
-            "references": [],
-            "reasoning": ""
-        }
+        return _solve_result(learn_response or "Не вдалося згенерувати відповідь", [])
     
     # Extract references from original solve_response
     references = extract_references(solve_response)
-    logger.info(f"Extracted {len(references)} references: {references}")
-    
-    # Use LLM to extract direct answer
-    llm_client = get_llm_client()
-    
-    system_prompt = """Ти експерт з витягування прямих відповідей на запитання.
-
-**ТВОЯ ЗАДАЧА:**
-З наданого тексту відповіді витягни ТІЛЬКИ пряму, коротку відповідь на конкретне запитання користувача.
-
-**ПРАВИЛА:**
-1. Відповідай ТІЛЬКИ на запитання - не додавай зайвої інформації
-3. Зберігай всі посилання на джерела у форматі [джерело: X]
-4. Якщо у тексті є кілька тем - витягни ТІЛЬКИ ту, що стосується запитання
-5. Відповідай українською мовою
-
-**ПРИКЛАДИ:**
-
-Запитання: "Яка столиця України?"
-Текст: "Україна - велика країна. Столиця України - Київ [джерело: 1]. Київ розташований на Дніпрі. Населення міста понад 3 мільйони."
-Відповідь: "Столиця України - Київ [джерело: 1]."
-
-Запитання: "Що любить їсти Марія?"
-Текст: "Марія - вчителька математики [джерело: 1]. Вона працює в школі №5. Марія обожнює борщ і вареники [джерело: 2]. У вільний час читає книги."
-Відповідь: "Марія обожнює борщ і вареники [джерело: 2]."
-"""
-
-    user_prompt = f"""**ЗАПИТАННЯ КОРИСТУВАЧА:**
-{message_text}
-
-**ТЕКСТ ВІДПОВІДІ:**
-{solve_response}
-
-**ПРЯМА ВІДПОВІДЬ:**"""
-
-    try:
-        extracted_answer = await llm_client.generate_async(
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=settings.temperature,
-            max_tokens=500
-        )
-        
-        logger.info(f"Extracted direct answer: {extracted_answer[:100]}...")
-        
-        # Combine with learn_response if present
-        final_response = extracted_answer
-        if learn_response:
-            final_response = extracted_answer + "\n\n" + learn_response
-        
-        return {
-            "response": final_response,
-            "references": references,
-            "reasoning": ""
-        }
-        
-    except Exception as e:
-        logger.error(f"Error extracting direct answer: {e}", exc_info=True)
-        # Fallback to original behavior
-        response = solve_response + "\n\n" + learn_response if learn_response else solve_response
-        return {
-            "response": response,
-            "references": references,
-            "reasoning": ""
-        }
\ No newline at end of file
+    logger.debug("Extracted %d references: %s", len(references), references)
+
+    # One answer source per request: the direct answer from context_answer, an
+    # already direct solve_response, or the extraction LLM call
+    streamed = False
+    if direct_answer:
+        logger.debug("Using direct answer from context_answer, skipping extraction LLM")
+        answer = direct_answer
+    elif _INSUFFICIENT_RE.match(solve_response) or _is_short_answer(solve_response):
+        # Refusals and already short answers need no extraction
+        logger.debug("solve_response is already direct, skipping extraction LLM")
+        answer = solve_response
+    else:
+        answer, streamed = await _extract_direct_answer(message_text, solve_response, sink)
+
+    if sink is not None and not streamed:
+        await sink.put(("generate_solve_response", answer))
+
+    return _solve_result(answer + "\n\n" + learn_response if learn_response else answer, references)
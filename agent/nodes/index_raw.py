@@ -1,14 +1,103 @@
+import asyncio
 import logging
-from typing import Any, Dict
+from itertools import batched
+from typing import Any, Dict, List, Optional
 
 from agent.state import AgentState
-from clients.hosted_embedder import HostedQwenEmbedder
-from clients.llm_client import get_llm_client
-from clients.qdrant_client import QdrantClient
+from clients.hosted_embedder import get_embedder
+from clients.llm_client import get_llm_client, system_message
+from clients.qdrant_client import QdrantClient, get_qdrant
+from clients.response_cache import cached_generate
+from config.settings import settings
 from langsmith import traceable
 
 logger = logging.getLogger(__name__)
 
+# Messages this short (single line) are already a brief fact; no LLM summary needed
+BRIEF_FACT_PASSTHROUGH_CHARS = 120
+
+# Brief fact is 1-2 short sentences; cap decode length and stop at the first blank line
+BRIEF_FACT_MAX_TOKENS = 60
+
+
+# Static prompt parts first, message last: keeps the request prefix cacheable
+BRIEF_FACT_SYSTEM_PROMPT = (
+    "Ти асистент для витягування фактів. Витягни ключовий факт з повідомлення користувача. "
+    "Будь стислим і фактичним (максимум 1-2 речення)."
+)
+BRIEF_FACT_USER_PREFIX = "Витягни ключовий факт з цього повідомлення:\n\n"
+
+
+def _is_trivial_fact(message_text: str) -> bool:
+    """Check whether the message can be used as its own brief fact."""
+    text = message_text.strip()
+    return len(text) <= BRIEF_FACT_PASSTHROUGH_CHARS and "\n" not in text
+
+
+async def _extract_brief_fact(message_text: str) -> str:
+    """Summarize the message into a brief fact (LLM only for non-trivial messages)."""
+    if not message_text:
+        return ""
+    if _is_trivial_fact(message_text):
+        logger.debug("Using short message as brief fact, skipping LLM")
+        return message_text.strip()
+
+    try:
+        messages = [
+            system_message(BRIEF_FACT_SYSTEM_PROMPT),
+            # The key fact sits at the start of long messages: bound the prompt
+            {"role": "user", "content": BRIEF_FACT_USER_PREFIX + message_text[:settings.brief_fact_max_input_chars]}
+        ]
+        # Exact tier only: a near-duplicate message may differ in the very fact being stored
+        brief_fact = await cached_generate(
+            f"brief_fact\n{message_text}",
+            lambda: get_llm_client().generate_async(
+                messages,
+                temperature=0.3,
+                max_tokens=BRIEF_FACT_MAX_TOKENS,
+                model=settings.brief_fact_model,
+                stop=["\n\n"],
+            ),
+        )
+        logger.debug("Extracted brief fact: %s", brief_fact[:100])
+        return brief_fact
+    except Exception as e:
+        logger.error(f"Failed to extract brief fact: {e}")
+        return ""
+
+
+async def _embed_and_insert(embedder, qdrant: QdrantClient, records: List[Dict[str, Any]]) -> None:
+    """
+    Embed records by their fact and upsert them chunk by chunk.
+
+    The upsert of one chunk runs while the next chunk is being embedded, so the
+    embedder and Qdrant latencies overlap instead of adding up.
+    """
+    pending_insert: Optional[asyncio.Task] = None
+    try:
+        for chunk in batched(records, settings.embedding_batch_max_size):
+            vectors = await embedder.create_batch([record["fact"] for record in chunk])
+            if pending_insert is not None:
+                await pending_insert
+            pending_insert = asyncio.create_task(qdrant.insert_records(
+                [{**record, "vector": vector} for record, vector in zip(chunk, vectors)]
+            ))
+    finally:
+        if pending_insert is not None:
+            await pending_insert
+
+
+@traceable(name="extract_brief_fact")
+async def extract_brief_fact_node(state: AgentState) -> Dict[str, Any]:
+    """
+    Extract the brief fact for a LEARN message.
+
+    Runs in parallel with check_conflicts (it only needs message_text),
+    so the summary call is off the critical path of the learn chain.
+    """
+    logger.info("=== Extract Brief Fact Node ===")
+    return {"brief_fact": await _extract_brief_fact(state.get("message_text", ""))}
+
 
 @traceable(name="index_raw")
 async def index_raw_node(state: AgentState) -> Dict[str, Any]:
@@ -16,7 +105,8 @@ async def index_raw_node(state: AgentState) -> Dict[str, Any]:
     Store raw memory updates directly in vector store without decomposition.
     
     Takes items from state["memory_updates"] and stores them as-is,
-    also extracting brief facts from the original message text using LLM.
+    also attaching the brief fact extracted from the original message text
+    (by extract_brief_fact_node, or here if it has not run).
     """
     
     logger.info("=== Index Raw Node ===")
@@ -27,73 +117,76 @@ async def index_raw_node(state: AgentState) -> Dict[str, Any]:
         logger.warning("index_raw_node: no memory_updates to store")
         return {}
     
-    embedder = HostedQwenEmbedder()
-    qdrant = await QdrantClient().initialize()
-    llm_client = get_llm_client()
-    
-    stored_count = 0
+    embedder = get_embedder()
     indexed_facts = []
     
-    try:
-        message_uid = state.get("message_uid", "")
-        message_text = state.get("message_text", "")
-        
-        # Extract brief fact from message text using LLM (Ukrainian prompt)
-        brief_fact = ""
-        if message_text:
-            try:
-                messages = [
-                    {
-                        "role": "system",
-                        "content": "Ти асистент для витягування фактів. Витягни ключовий факт з повідомлення користувача. Будь стислим і фактичним (максимум 1-2 речення)."
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Витягни ключовий факт з цього повідомлення:\n\n{message_text}"
-                    }
-                ]
-                brief_fact = await llm_client.generate_async(messages, temperature=0.3, max_tokens=100)
-                logger.info(f"Extracted brief fact: {brief_fact[:100]}")
-            except Exception as e:
-                logger.error(f"Failed to extract brief fact: {e}")
-                brief_fact = ""
-        
-        # Create vector from message_text
-        message_vector = await embedder.create(message_text) if message_text else None
-        
-        for update_text in memory_updates:
-            if not update_text:
-                logger.warning("Skipping empty memory update")
-                continue
-            
-            # Use message_text vector if available, otherwise create from update_text
-            vector_to_store = message_vector if message_vector else await embedder.create(update_text)
-            
-            # Store fact (whole message_text) and brief_fact separately
-            await qdrant.insert_record(
-                vector=vector_to_store,
-                fact=message_text if message_text else update_text,
-                message_id=message_uid,
-                is_relevant=True,
-                brief_fact=brief_fact if brief_fact else None,
-            )
-            
-            indexed_facts.append({
-                "fact": message_text if message_text else update_text,
-                "brief_fact": brief_fact
+    message_uid = state.get("message_uid", "")
+    message_text = state.get("message_text", "")
+
+    # Repeated updates (retries, echoes) are embedded and stored once
+    updates = list(dict.fromkeys(update_text for update_text in memory_updates if update_text))
+    if len(updates) < len(memory_updates):
+        logger.warning("Skipping %d empty or duplicate memory updates", len(memory_updates) - len(updates))
+
+    async def _embed_message():
+        # The message vector is shared by every update
+        return await embedder.create_batch([message_text]) if message_text else []
+
+    async def _brief_fact():
+        # Brief fact normally arrives from extract_brief_fact_node
+        brief_fact = state.get("brief_fact")
+        if brief_fact is None:
+            brief_fact = await _extract_brief_fact(message_text)
+        return brief_fact
+
+    # Independent I/O: Qdrant setup, message embedding and (fallback) brief fact
+    qdrant, vectors, brief_fact = await asyncio.gather(
+        get_qdrant(),
+        _embed_message(),
+        _brief_fact(),
+    )
+    
+    if message_text and updates:
+        # Every update would get the same vector and fact: store the message
+        # once and keep the updates in its payload
+        records = [{
+            "vector": vectors[0],
+            "fact": message_text,
+            "message_id": message_uid,
+            "is_relevant": True,
+            "brief_fact": brief_fact if brief_fact else None,
+            "payload": {"updates": updates},
+        }]
+        indexed_facts.append({"fact": message_text, "brief_fact": brief_fact})
+        await qdrant.insert_records(records)
+    else:
+        records = []
+        for update_text in updates:
+            records.append({
+                "fact": update_text,
+                "message_id": message_uid,
+                "is_relevant": True,
+                "brief_fact": brief_fact if brief_fact else None,
             })
-            
-            stored_count += 1
-            logger.info(
-                f"Stored raw memory update {stored_count} in Qdrant",
-                extra={
-                    "message_id": message_uid,
-                    "fact": (message_text if message_text else update_text)[:50],
-                    "brief_fact": brief_fact[:50] if brief_fact else "",
-                },
-            )
-    finally:
-        await qdrant.close()
+            indexed_facts.append({"fact": update_text, "brief_fact": brief_fact})
+        if len(records) >= settings.qdrant_bulk_insert_threshold:
+            # Chunked upserts of a bulk load: build the HNSW graph once at the end
+            async with qdrant.indexing_paused():
+                await _embed_and_insert(embedder, qdrant, records)
+        else:
+            await _embed_and_insert(embedder, qdrant, records)
+
+    stored_count = len(updates)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Stored %d raw memory updates as %d Qdrant points",
+            stored_count,
+            len(records),
+            extra={
+                "message_id": message_uid,
+                "brief_fact": brief_fact[:50] if brief_fact else "",
+            },
+        )
     
-    logger.info(f"Stored {stored_count} raw memory updates total")
+    logger.info("Stored %d raw memory updates total", stored_count)
     return {"indexed_facts": indexed_facts}
@@ -4,30 +4,27 @@ Query Analyzer Node - аналізує запит користувача та ф
 Цей вузол розуміє ЩО потрібно для відповіді та генерує оптимізовані пошукові запити.
 """
 
+import asyncio
+import inspect
 import logging
-import json
+import orjson
 from typing import Dict, Any, List
 from langsmith import traceable
 
+from agent.helpers import parse_llm_json
 from agent.state import AgentState
-from clients.llm_client import get_llm_client
+from clients.hosted_embedder import get_embedder
+from clients.llm_client import get_llm_client, system_message
+from clients.response_cache import cached_generate
+from clients.semantic_cache import semantic_cached_generate
 from models.schemas import PlanAnalysis
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
-
-def _build_analysis_prompt(message_text: str) -> list[dict[str, str]]:
-    """
-    Формує промпт для аналізу запиту користувача.
-
-    Args:
-        message_text: Запит користувача
-
-    Returns:
-        Список повідомлень для LLM
-    """
-    system_prompt = """Ти експерт-планувальник. Твоя задача: уважно проаналізувати задачу користувача, створити детальний і вичерпний план для вирішення задачі. Також ти маєш визначити яка інформація необхідна для вирішення пунктів плану та задачі і в цілому. 
+# Static system prompts: module constants so every request sends identical bytes
+# and the server reuses the cached prefix
+ANALYSIS_SYSTEM_PROMPT = """Ти експерт-планувальник. Твоя задача: уважно проаналізувати задачу користувача, створити детальний і вичерпний план для вирішення задачі. Також ти маєш визначити яка інформація необхідна для вирішення пунктів плану та задачі і в цілому. 
     Створи докладний покроковий план виконання задачі . Після цього детально опиши яка інформація тобі потрібна для точного розв'язання задачі. Відповідь має містити план та перелік конкретних нюансів необхідної теорії якої бракує для виконання пунктів плану та задачі.
     Надавай відповідь у форматі JSON {"plan": "...", "required_info": "..."}
 
@@ -43,22 +40,34 @@ def _build_analysis_prompt(message_text: str) -> list[dict[str, str]]:
 
     """
 
-    user_prompt = f"""**ЗАПИТ КОРИСТУВАЧА:**
-{message_text}"""
+SEARCH_QUERIES_SYSTEM_PROMPT = """Ти - експерт з формування запитів для векторного пошуку. Твоя задача проаналізувати наданий план та свормувати список запитів для пошуку в знаннях. 
+    Уважно проаналізуй план та інформацію якої бракує для вирішення задачі. Сформуй список точних запитів для пошуку в знаннях. Запит не має бути загальним, а повинен бути максимально точним та конкретним.
 
-    return [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": user_prompt}
-    ]
+    Правила формування запитів:
+    1. Запит не має бути загальним, це має бути запит на конкретний шматок інформації.
+    2. Запит повинен бути максимально точним та конкретним та стосуватися певної деталі.
 
+    Приклади запитів:
+    НЕПРАВИЛЬНО: "Права людини"
+    ПРАВИЛЬНО: "Права людини щодо власного майна у сучасному світі"
 
-def _build_search_queries_prompt(plan: str):
-    system_prompt = """Ти - експерт з формування запитів для векторного пошуку. Твоя задача проаналізувати наданий план та свормувати список запитів для пошуку в знаннях. 
-    Уважно проаналізуй план та інформацію якої бракує для вирішення задачі. Сформуй список точних запитів для пошуку в знаннях. Запит не має бути загальним, а повинен бути максимально точним та конкретним.
+    НЕПРАВИЛЬНО: "Респіраторні захворення"
+    ПРАВИЛЬНО: "Опис первинних симптомів респіраторних захворювань"
+
+    НЕПРАВИЛЬНО: "Мова програмування JavaScript"
+    ПРАВИЛЬНО: "Цикли в JavaScript"
+
+
+    Відповідай в форматі JSON ["запит1", "запит2", ...]"""
+
+# parallel_query_analysis: the plan is not ready yet, so the queries come from the task itself
+TASK_QUERIES_SYSTEM_PROMPT = """Ти - експерт з формування запитів для векторного пошуку. Твоя задача проаналізувати запит користувача, визначити яких конкретних знань бракує для його виконання та сформувати список запитів для пошуку в знаннях.
+    Уважно проаналізуй задачу: які факти, визначення, правила чи деталі потрібні, щоб її розв'язати. Сформуй список точних запитів для пошуку в знаннях. Запит не має бути загальним, а повинен бути максимально точним та конкретним.
 
     Правила формування запитів:
     1. Запит не має бути загальним, це має бути запит на конкретний шматок інформації.
     2. Запит повинен бути максимально точним та конкретним та стосуватися певної деталі.
+    3. Не переписуй задачу дослівно: кожен запит стосується однієї потрібної для неї деталі.
 
     Приклади запитів:
     НЕПРАВИЛЬНО: "Права людини"
@@ -72,10 +81,50 @@ def _build_search_queries_prompt(plan: str):
 
 
     Відповідай в форматі JSON ["запит1", "запит2", ...]"""
-    user_prompt = f"План: {plan}"
+
+# The prompts above are written indented; cleandoc drops that indentation so the
+# cached prefix holds no whitespace-only tokens
+ANALYSIS_SYSTEM_PROMPT = inspect.cleandoc(ANALYSIS_SYSTEM_PROMPT)
+SEARCH_QUERIES_SYSTEM_PROMPT = inspect.cleandoc(SEARCH_QUERIES_SYSTEM_PROMPT)
+TASK_QUERIES_SYSTEM_PROMPT = inspect.cleandoc(TASK_QUERIES_SYSTEM_PROMPT)
+
+# Built once: the same system message object is sent on every call
+ANALYSIS_SYSTEM_MESSAGE = system_message(ANALYSIS_SYSTEM_PROMPT)
+SEARCH_QUERIES_SYSTEM_MESSAGE = system_message(SEARCH_QUERIES_SYSTEM_PROMPT)
+TASK_QUERIES_SYSTEM_MESSAGE = system_message(TASK_QUERIES_SYSTEM_PROMPT)
+
+ANALYSIS_USER_PREFIX = "**ЗАПИТ КОРИСТУВАЧА:**\n"
+SEARCH_QUERIES_USER_PREFIX = "План: "
+TASK_QUERIES_USER_PREFIX = "Задача: "
+
+
+def _build_analysis_prompt(message_text: str) -> list[dict[str, str]]:
+    """
+    Формує промпт для аналізу запиту користувача.
+
+    Args:
+        message_text: Запит користувача
+
+    Returns:
+        Список повідомлень для LLM
+    """
     return [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": user_prompt}
+        ANALYSIS_SYSTEM_MESSAGE,
+        {"role": "user", "content": ANALYSIS_USER_PREFIX + message_text}
+    ]
+
+
+def _build_search_queries_prompt(plan: str):
+    return [
+        SEARCH_QUERIES_SYSTEM_MESSAGE,
+        {"role": "user", "content": SEARCH_QUERIES_USER_PREFIX + plan}
+    ]
+
+
+def _build_task_queries_prompt(message_text: str):
+    return [
+        TASK_QUERIES_SYSTEM_MESSAGE,
+        {"role": "user", "content": TASK_QUERIES_USER_PREFIX + message_text}
     ]
 
 
@@ -91,18 +140,8 @@ def _parse_search_queries(raw_response: str, fallback_query: str) -> List[str]:
         List of search query strings
     """
     try:
-        # Clean markdown code blocks if present
-        response_text = raw_response.strip()
-        if response_text.startswith("```json"):
-            response_text = response_text[7:]
-        elif response_text.startswith("```"):
-            response_text = response_text[3:]
-        if response_text.endswith("```"):
-            response_text = response_text[:-3]
-        response_text = response_text.strip()
-        
-        # Parse JSON
-        parsed = json.loads(response_text)
+        # Parse JSON (markdown code fences are stripped)
+        parsed = parse_llm_json(raw_response)
         
         # Validate it's a list
         if not isinstance(parsed, list):
@@ -124,14 +163,14 @@ def _parse_search_queries(raw_response: str, fallback_query: str) -> List[str]:
         
         # Limit to max 3 queries
         if len(queries) > 10:
-            logger.info(f"Limiting {len(queries)} queries to top 3")
+            logger.info("Limiting %d queries to top 3", len(queries))
             queries = queries[:10]
         
         return queries
         
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         logger.error(f"Failed to parse JSON from search queries response: {e}")
-        logger.debug(f"Raw response: {raw_response[:200]}")
+        logger.debug("Raw response: %s", raw_response[:200])
         return [fallback_query]
     except Exception as e:
         logger.error(f"Unexpected error parsing search queries: {e}", exc_info=True)
@@ -164,39 +203,70 @@ async def query_analyzer_node(state: AgentState) -> Dict[str, Any]:
             "search_queries": [message_text] if message_text else []
         }
 
-    logger.info(f"Analyzing query: '{message_text}'")
+    logger.debug("Analyzing query: '%s'", message_text)
 
-    try:
+    async def _analyze() -> Dict[str, Any]:
         # Формуємо промпт
         analysis_messages = _build_analysis_prompt(message_text)
 
         # Викликаємо LLM зі structured output для отримання плану та необхідної інформації
         llm_client = get_llm_client()
-        plan_analysis: PlanAnalysis = await llm_client.generate_async(
+        plan_call = llm_client.generate_async(
             messages=analysis_messages,
             temperature=settings.temperature,
             max_tokens=500,
             response_format=PlanAnalysis
         )
 
-        # Формуємо текст для генерації пошукових запитів
-        plan_text = f"План: {plan_analysis.plan}\n\nНеобхідна інформація: {plan_analysis.required_info}"
-        search_queries_messages = _build_search_queries_prompt(plan_text)
-        search_queries_raw = await llm_client.generate_async(
-            messages=search_queries_messages,
-            temperature=settings.temperature,
-            max_tokens=500
-        )
+        if settings.parallel_query_analysis:
+            # Search queries seeded by the task itself: both calls in flight at once
+            plan_analysis, search_queries_raw = await asyncio.gather(
+                plan_call,
+                llm_client.generate_async(
+                    messages=_build_task_queries_prompt(message_text),
+                    temperature=settings.temperature,
+                    max_tokens=500
+                ),
+            )
+        else:
+            plan_analysis: PlanAnalysis = await plan_call
+
+            # Формуємо текст для генерації пошукових запитів
+            plan_text = f"План: {plan_analysis.plan}\n\nНеобхідна інформація: {plan_analysis.required_info}"
+            search_queries_messages = _build_search_queries_prompt(plan_text)
+            search_queries_raw = await llm_client.generate_async(
+                messages=search_queries_messages,
+                temperature=settings.temperature,
+                max_tokens=500
+            )
 
         # Parse and validate search_queries as JSON list
         search_queries = _parse_search_queries(search_queries_raw, message_text)
         
-        logger.info(f"Generated plan: {plan_analysis.plan[:100]}...")
-        logger.info(f"Required info: {plan_analysis.required_info[:100]}...")
-        logger.info(f"Generated {len(search_queries)} search queries: {search_queries}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Generated plan: %s...", plan_analysis.plan[:100])
+            logger.debug("Required info: %s...", plan_analysis.required_info[:100])
+            logger.debug("Generated %d search queries: %s", len(search_queries), search_queries)
 
         return {"plan": plan_analysis.plan, "search_queries": search_queries}
 
+    try:
+        # Repeated queries reuse the earlier plan and search queries without both
+        # LLM round-trips; paraphrases only when the semantic tier is opted into,
+        # since a close question ("who manages X" / "who managed X") may need another plan
+        if settings.query_analysis_semantic_cache:
+            analysis = await semantic_cached_generate(
+                "query_analysis",
+                message_text,
+                lambda: get_embedder().create(message_text),
+                _analyze,
+                threshold=settings.query_analysis_cache_threshold,
+            )
+        else:
+            analysis = await cached_generate(f"query_analysis\n{message_text}", _analyze)
+        # Cached values are shared between requests: hand out a fresh list
+        return {"plan": analysis["plan"], "search_queries": list(analysis["search_queries"])}
+
     except Exception as e:
         logger.error(f"Error during query analysis: {e}", exc_info=True)
         logger.warning("Falling back to basic analysis")
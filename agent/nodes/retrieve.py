@@ -4,12 +4,13 @@ Performs initial context retrieval BEFORE ReAct loop.
 This gives the agent starting context to reason with.
 """
 
+import asyncio
 import logging
 from typing import Dict, Any, List
 
 from agent.state import AgentState
-from clients.qdrant_client import QdrantClient
-from clients.hosted_embedder import HostedQwenEmbedder
+from clients.qdrant_client import get_qdrant
+from clients.hosted_embedder import get_embedder
 from langsmith import traceable
 
 logger = logging.getLogger(__name__)
@@ -44,23 +45,25 @@ async def retrieve_context_node(state: AgentState) -> Dict[str, Any]:
         logger.info("No search queries available, using original message_text")
         search_queries = [message_text]
 
-    logger.info(f"Search queries: {search_queries}")
+    logger.debug("Search queries: %s", search_queries)
 
     # Initialize clients
-    embedder = HostedQwenEmbedder()
-    qdrant = QdrantClient()
-    await qdrant.initialize()
+    embedder = get_embedder()
 
     try:
         all_results = []
         seen_message_ids = set()  # Deduplicate by source message ID
 
-        # Виконуємо пошук для кожного запиту
-        for idx, query in enumerate(search_queries):
-            logger.info(f"Query {idx + 1}/{len(search_queries)}: '{query}'")
+        # Embed all queries in a single request instead of one round-trip per query,
+        # overlapped with the Qdrant connection/collection check
+        query_vectors, qdrant = await asyncio.gather(
+            embedder.create_batch(search_queries),
+            get_qdrant(),
+        )
 
-            # Generate embedding for this query
-            query_vector = await embedder.create(query)
+        # Виконуємо пошук для кожного запиту
+        for idx, (query, query_vector) in enumerate(zip(search_queries, query_vectors)):
+            logger.debug("Query %d/%d: '%s'", idx + 1, len(search_queries), query)
 
             # Search for relevant context
             # Берем по 3 результати для кожного запиту замість 5 для одного
@@ -73,13 +76,15 @@ async def retrieve_context_node(state: AgentState) -> Dict[str, Any]:
                 only_relevant=True,
             )
 
-            logger.info(f"  Found {len(search_results)} results for this query")
+            logger.debug("  Found %d results for this query", len(search_results))
             all_results.extend(search_results)
 
-        logger.info(f"Total raw results: {len(all_results)}")
+        logger.debug("Total raw results: %d", len(all_results))
         
-        # Build context dicts with deduplication
+        # Build context dicts with deduplication; best-scored hit first so the
+        # copy kept for a message (found by several queries) is its best match
         context_dicts = []
+        all_results.sort(key=lambda hit: hit.get("score", 0.0), reverse=True)
 
         for hit in all_results:
             payload = hit.get("payload", {})
@@ -92,12 +97,14 @@ async def retrieve_context_node(state: AgentState) -> Dict[str, Any]:
             timestamp = payload.get("timestamp")
 
             # Deduplicate: skip if we already have context from this message
-            if message_id in seen_message_ids:
-                logger.debug(f"Skipping duplicate from message {message_id}")
+            # (facts without a source message are told apart by content)
+            dedup_key = (message_id, fact if message_id == "unknown" else "")
+            if dedup_key in seen_message_ids:
+                logger.debug("Skipping duplicate from message %s", message_id)
                 continue
 
             if fact:
-                seen_message_ids.add(message_id)
+                seen_message_ids.add(dedup_key)
                 context_dicts.append({
                     "content": fact,
                     "brief_fact": brief_fact,
@@ -105,13 +112,17 @@ async def retrieve_context_node(state: AgentState) -> Dict[str, Any]:
                     "timestamp": timestamp,
                     "score": score
                 })
-                logger.debug(f"Retrieved: {fact[:50]}... (score: {score:.3f})")
 
         # Sort by score descending and limit to top 10
         context_dicts.sort(key=lambda x: x["score"], reverse=True)
         context_dicts = context_dicts[:10]
 
-        logger.info(f"Retrieved {len(context_dicts)} unique context items (after deduplication)")
+        logger.info("Retrieved %d unique context items (after deduplication)", len(context_dicts))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Retrieved:\n%s",
+                "\n".join(f"  - {c['content'][:50]}... (score: {c['score']:.3f})" for c in context_dicts),
+            )
         
         return {
             "retrieved_context": context_dicts
@@ -120,6 +131,3 @@ async def retrieve_context_node(state: AgentState) -> Dict[str, Any]:
     except Exception as e:
         logger.error(f"Error during context retrieval: {e}", exc_info=True)
         return {"retrieved_context": []}
-        
-    finally:
-        await qdrant.close()
@@ -24,17 +24,20 @@ class AgentState(TypedDict):
     subtasks: List[str]  # decomposed subtasks from task decomposition
 
     indexed_facts: List[Dict[str, Any]]  # indexed facts from decomposer
+    brief_fact: Optional[str]  # brief fact for the LEARN message (None = not extracted yet)
     # SOLVE path - TYPED structures
     query_analysis: Optional[Dict[str, Any]]  # query analysis result
     retrieved_context: List[RetrievedContext]
     relevant_context: List[Dict[str, Any]]  # filtered context after actualization
     react_steps: List[ReactStep]
     conflicts: List[Tuple[str, str]]  # (message_id, fact)
+    duplicates: List[Tuple[str, str]]  # (message_id, fact) restated by the update, superseded
     validation_attempts: int  # track validator retries
 
     # Output
     learn_response: str
     solve_response: str
+    direct_answer: Optional[str]  # short answer from context_answer (None = extract separately)
     response: str
     references: List[str]  # message UIDs
     reasoning: Optional[str]
@@ -76,6 +79,7 @@ def create_initial_state(
         memory_updates=[],
         subtasks=[],
         indexed_facts=[],
+        brief_fact=None,
         query_analysis=None,
         retrieved_context=[],
         relevant_context=[],
@@ -84,6 +88,7 @@ def create_initial_state(
         validation_attempts=0,
         learn_response="",
         solve_response="",
+        direct_answer=None,
         response="",
         references=[],
         reasoning=None,
@@ -4,6 +4,7 @@ Stores message_uid -> {text, timestamp, original_message} mappings.
 """
 import logging
 import sqlite3
+from collections import OrderedDict
 from typing import Dict, Optional
 from datetime import datetime
 from pathlib import Path
@@ -15,10 +16,20 @@ logger = logging.getLogger(__name__)
 class MessageStore:
     """Thread-safe SQLite-based persistent KV store for raw messages."""
     
-    def __init__(self, db_path: str = "/tmp/messages.db"):
+    def __init__(self, db_path: str = "/tmp/messages.db", cache_size: int = 1024):
         self.db_path = db_path
         self._lock = Lock()
+        # Bounded LRU of recent lookups (message_uid -> row, None for misses)
+        self._cache: "OrderedDict[str, Optional[Dict]]" = OrderedDict()
+        self._cache_size = cache_size
         self._initialize_db()
+
+    def _cache_put(self, message_uid: str, row: Optional[Dict]) -> None:
+        """Insert into the LRU, evicting the oldest entry when full. Caller holds the lock."""
+        self._cache[message_uid] = row
+        self._cache.move_to_end(message_uid)
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
     
     def _initialize_db(self) -> None:
         """Create database and table if they don't exist."""
@@ -60,7 +71,10 @@ class MessageStore:
                     (message_uid, raw_message, timestamp.isoformat())
                 )
                 conn.commit()
-                logger.debug(f"Stored message {message_uid} in persistent store")
+                self._cache_put(
+                    message_uid, {"text": raw_message, "timestamp": timestamp}
+                )
+                logger.debug("Stored message %s in persistent store", message_uid)
             finally:
                 conn.close()
     
@@ -75,6 +89,11 @@ class MessageStore:
             Dict with keys: text, timestamp (or None if not found)
         """
         with self._lock:
+            if message_uid in self._cache:
+                self._cache.move_to_end(message_uid)
+                row = self._cache[message_uid]
+                return dict(row) if row else None
+
             conn = sqlite3.connect(self.db_path)
             try:
                 cursor = conn.execute(
@@ -87,12 +106,14 @@ class MessageStore:
                 )
                 row = cursor.fetchone()
                 
+                result = None
                 if row:
-                    return {
+                    result = {
                         "text": row[0],
                         "timestamp": datetime.fromisoformat(row[1])
                     }
-                return None
+                self._cache_put(message_uid, result)
+                return dict(result) if result else None
             finally:
                 conn.close()
     
@@ -103,6 +124,7 @@ class MessageStore:
             try:
                 conn.execute("DELETE FROM messages")
                 conn.commit()
+                self._cache.clear()
                 logger.info("Message store cleared")
             finally:
                 conn.close()
@@ -0,0 +1,76 @@
+"""
+Startup warmup of the LLM backend prefix cache.
+
+The first request after a cold start pays full prefill on the long static
+system prompts. Sending one throwaway 1-token request per prompt lets
+vLLM's prefix cache hold those blocks before real traffic arrives.
+
+Structured outputs have the same cold-start cost: the server compiles a
+grammar for each JSON schema on first use, so every response_format used on
+the solve path is requested once as well.
+"""
+
+import asyncio
+import logging
+
+from agent.nodes.actualize import RelevanceAnalysis
+from agent.nodes.classify import SYSTEM_PROMPT as CLASSIFY_SYSTEM_PROMPT
+from agent.nodes.context_answer import SYSTEM_PROMPT as CONTEXT_ANSWER_SYSTEM_PROMPT
+from agent.nodes.generate_solve_response import SYSTEM_PROMPT as SOLVE_SYSTEM_PROMPT
+from agent.nodes.query_analyzer import (
+    ANALYSIS_SYSTEM_PROMPT,
+    SEARCH_QUERIES_SYSTEM_PROMPT,
+    TASK_QUERIES_SYSTEM_PROMPT,
+)
+from clients.llm_client import get_llm_client, system_message
+from models.schemas import ContextAnswer, PlanAnalysis
+
+logger = logging.getLogger(__name__)
+
+WARMUP_PROMPTS = {
+    "classify": CLASSIFY_SYSTEM_PROMPT,
+    "context_answer": CONTEXT_ANSWER_SYSTEM_PROMPT,
+    "generate_solve_response": SOLVE_SYSTEM_PROMPT,
+    "query_analysis": ANALYSIS_SYSTEM_PROMPT,
+    "search_queries": SEARCH_QUERIES_SYSTEM_PROMPT,
+    "task_queries": TASK_QUERIES_SYSTEM_PROMPT,
+}
+
+# Schemas passed as response_format by the nodes
+WARMUP_SCHEMAS = (ContextAnswer, RelevanceAnalysis, PlanAnalysis)
+
+
+async def _warmup_prompt(name: str, prompt: str) -> None:
+    try:
+        await get_llm_client().generate_async(
+            messages=[system_message(prompt), {"role": "user", "content": "ping"}],
+            temperature=0.0,
+            max_tokens=1,
+        )
+        logger.debug("Warmed up prefix cache for %s", name)
+    except Exception as e:
+        logger.warning(f"Prefix cache warmup failed for {name}: {e}")
+
+
+async def _warmup_schema(schema: type) -> None:
+    # Straight on the LangChain model: generate_async would log the expected failure as an error.
+    # Params are bound after with_structured_output, which drops params bound before it
+    llm = get_llm_client().get_langchain_llm().with_structured_output(schema).bind(
+        temperature=0.0, max_tokens=8
+    )
+    try:
+        await llm.ainvoke("ping")
+    except Exception as e:
+        # 8 tokens rarely make a valid object; the grammar is compiled either way
+        logger.debug("Schema warmup for %s ended with: %s", schema.__name__, e)
+
+
+async def warmup_prompt_cache() -> None:
+    """Prime the backend prefix and grammar caches (never raises)."""
+    await asyncio.gather(
+        *(_warmup_prompt(name, prompt) for name, prompt in WARMUP_PROMPTS.items()),
+        *(_warmup_schema(schema) for schema in WARMUP_SCHEMAS),
+    )
+    logger.info(
+        "LLM warmup finished (%d prompts, %d schemas)", len(WARMUP_PROMPTS), len(WARMUP_SCHEMAS)
+    )
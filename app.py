@@ -1,3 +1,5 @@
+import asyncio
+import importlib.util
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -6,7 +8,11 @@ from config.logging_config import configure_logging
 # from db.simple_init import init_database
 import logging
 
-from utils import setup_langsmith
+from agent.warmup import warmup_prompt_cache
+from clients.llm_client import close_http_async_client
+from clients.qdrant_client import close_qdrant
+from config.settings import settings
+from utils import flush_langsmith, setup_langsmith
 
 # Configure logging on startup
 configure_logging(level="INFO")
@@ -15,6 +21,13 @@ logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # aiohttp is imported lazily on the first batch: refuse to start without it
+    if settings.llm_batch_aiohttp and importlib.util.find_spec("aiohttp") is None:
+        raise RuntimeError(
+            "llm_batch_aiohttp is enabled but aiohttp is not installed "
+            "(pip install aiohttp, or the 'batch' extra)"
+        )
+
     # Startup: Initialize database
     # logger.info("Application startup: initializing database...")
     
@@ -37,8 +50,24 @@ async def lifespan(app: FastAPI):
         # logger.info("✓ LangSmith instrumentation enabled")
     except Exception as e:
         logger.warning(f"LangSmith setup warning: {e}")
+
+    # Prime the LLM prefix cache in the background so startup is not blocked
+    warmup_task = None
+    if settings.llm_warmup_on_startup:
+        warmup_task = asyncio.create_task(warmup_prompt_cache())
     yield
 
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    await close_http_async_client()
+    await close_qdrant()
+
+    # Shutdown: flush traces queued by the background exporter
+    try:
+        flush_langsmith()
+    except Exception as e:
+        logger.warning(f"LangSmith flush warning: {e}")
+
 # Create FastAPI application
 app = FastAPI(
     title="Tabularas Agent API",
@@ -3,16 +3,77 @@ Alternative embedder using hosted Qwen embeddings API.
 Use this instead of CustomEmbedder when connecting to Lapathon hosted API.
 """
 
-from typing import List
+from typing import List, Optional, Tuple
 import asyncio
 import logging
+from itertools import batched
 from openai import AsyncOpenAI
 
+from clients.llm_client import get_http_async_client
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
 
+class _EmbeddingBatcher:
+    """
+    Coalesce concurrent single-text embedding calls into one API request.
+
+    Texts submitted in the same event-loop tick (plus an optional window) are
+    sent together; if the batch request fails, each text is retried alone so
+    one bad input does not fail the other callers.
+    """
+
+    def __init__(self, embedder: "HostedQwenEmbedder", max_size: int, window_s: float):
+        self.embedder = embedder
+        self.max_size = max_size
+        self.window_s = window_s
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def submit(self, text: str) -> List[float]:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((text, future))
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush())
+        return await future
+
+    async def _flush(self) -> None:
+        await asyncio.sleep(self.window_s)
+        try:
+            while self._pending:
+                batch = self._pending[:self.max_size]
+                del self._pending[:self.max_size]
+                await self._run_batch(batch)
+        finally:
+            self._flush_task = None
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        try:
+            embeddings = await self.embedder._request([text for text, _ in batch])
+            results = list(zip(batch, embeddings))
+        except Exception as e:
+            if len(batch) == 1:
+                self._resolve(batch[0][1], exception=e)
+                return
+            logger.warning(f"Batched embedding failed, retrying {len(batch)} texts one by one: {e}")
+            for item in batch:
+                await self._run_batch([item])
+            return
+
+        for (_text, future), embedding in results:
+            self._resolve(future, result=embedding)
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, result=None, exception: Optional[BaseException] = None) -> None:
+        if future.done():
+            return
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+
 class HostedQwenEmbedder:
     """
     Embedder using hosted text-embedding-qwen model.
@@ -43,10 +104,11 @@ class HostedQwenEmbedder:
         logger.info(f"Initializing hosted embedder: {self.model_name}")
         logger.info(f"API URL: {self.base_url}")
 
-        # Create OpenAI client
+        # Create OpenAI client on the shared keep-alive pool (same server as the LLM)
         self.client = AsyncOpenAI(
             base_url=self.base_url,
-            api_key=self.api_key
+            api_key=self.api_key,
+            http_client=get_http_async_client()
         )
 
         # Qwen embeddings dimension (check with test_hosted_api.py)
@@ -54,6 +116,12 @@ class HostedQwenEmbedder:
         # Will be determined on first call
         self.dimension = None
 
+        self._batcher = _EmbeddingBatcher(
+            self,
+            max_size=settings.embedding_batch_max_size,
+            window_s=settings.embedding_batch_window_ms / 1000,
+        )
+
     def _clean_text(self, text: str) -> str:
         """Clean text from invalid UTF-8 surrogate characters."""
         try:
@@ -75,6 +143,23 @@ class HostedQwenEmbedder:
         """
         return await self.create(text)
 
+    async def _request(self, texts: List[str]) -> List[List[float]]:
+        """Embed already-cleaned texts with a single API request."""
+        response = await self.client.embeddings.create(
+            input=texts,
+            model=self.model_name,
+            encoding_format="float"
+        )
+
+        embeddings = [item.embedding for item in response.data]
+
+        # Store dimension on first call
+        if self.dimension is None and embeddings:
+            self.dimension = len(embeddings[0])
+            logger.info(f"Embedding dimension: {self.dimension}")
+
+        return embeddings
+
     async def create(self, input_data: str | List[str]) -> List[float]:
         """
         Create embedding for a SINGLE text.
@@ -97,20 +182,10 @@ class HostedQwenEmbedder:
         text = self._clean_text(text)
 
         try:
-            response = await self.client.embeddings.create(
-                input=text,
-                model=self.model_name,
-                encoding_format="float"
-            )
-
-            embedding = response.data[0].embedding
-
-            # Store dimension on first call
-            if self.dimension is None:
-                self.dimension = len(embedding)
-                logger.info(f"Embedding dimension: {self.dimension}")
-
-            return embedding
+            if settings.embedding_batching:
+                # Shares one request with other embeddings issued concurrently
+                return await self._batcher.submit(text)
+            return (await self._request([text]))[0]
 
         except Exception as e:
             logger.error(f"Error creating embedding: {e}")
@@ -120,6 +195,9 @@ class HostedQwenEmbedder:
         """
         Create embeddings for batch of texts.
 
+        Texts are sent in chunks of settings.embedding_batch_max_size, one API
+        request per chunk.
+
         Args:
             input_data_list: List of strings to embed
 
@@ -132,40 +210,29 @@ class HostedQwenEmbedder:
         # Clean all texts from invalid UTF-8 characters
         cleaned_texts = [self._clean_text(text) for text in input_data_list]
 
-        try:
-            # The API might support batch requests
-            # If it does, this is more efficient
-            response = await self.client.embeddings.create(
-                input=cleaned_texts,
-                model=self.model_name,
-                encoding_format="float"
-            )
-
-            embeddings = [item.embedding for item in response.data]
+        embeddings: List[List[float]] = []
+        for chunk in batched(cleaned_texts, settings.embedding_batch_max_size):
+            try:
+                embeddings.extend(await self._request(list(chunk)))
 
-            # Store dimension on first call
-            if self.dimension is None and embeddings:
-                self.dimension = len(embeddings[0])
-                logger.info(f"Embedding dimension: {self.dimension}")
+            except Exception as e:
+                logger.warning(f"Batch embedding failed, falling back to sequential: {e}")
 
-            return embeddings
+                # Fallback: Process one by one
+                for text in chunk:
+                    embeddings.append((await self._request([text]))[0])
 
-        except Exception as e:
-            logger.warning(f"Batch embedding failed, falling back to sequential: {e}")
+        return embeddings
 
-            # Fallback: Process one by one
-            embeddings = []
-            for text in input_data_list:
-                embedding = await self.create(text)
-                embeddings.append(embedding)
 
-            return embeddings
+# Global embedder instance (shares one AsyncOpenAI connection pool across requests)
+_embedder: HostedQwenEmbedder | None = None
 
 
 # Factory function for easy switching
 def get_embedder(use_hosted: bool = False) -> HostedQwenEmbedder:
     """
-    Get embedder instance based on configuration.
+    Get or create the global embedder instance.
 
     Args:
         use_hosted: If True, use hosted API; if False, use local sentence-transformers
@@ -173,5 +240,8 @@ def get_embedder(use_hosted: bool = False) -> HostedQwenEmbedder:
     Returns:
         HostedQwenEmbedder instance
     """
-    logger.info("Using hosted Qwen embeddings")
-    return HostedQwenEmbedder()
\ No newline at end of file
+    global _embedder
+    if _embedder is None:
+        logger.info("Using hosted Qwen embeddings")
+        _embedder = HostedQwenEmbedder()
+    return _embedder
\ No newline at end of file
@@ -5,8 +5,11 @@ Supports structured outputs and fallback to OpenAI API.
 
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
-from typing import Optional, Type, TypeVar, Any, Dict, List
+from langchain_core.rate_limiters import InMemoryRateLimiter
+from typing import AsyncIterator, Optional, Type, TypeVar, Any, Dict, List
 from pydantic import BaseModel
+import asyncio
+import httpx
 import logging
 
 from config.settings import settings
@@ -51,17 +54,32 @@ class LLMClient:
             model=self.model_name,
             timeout=120.0,  # 120s timeout for hosted API
             max_retries=2,
+            http_async_client=get_http_async_client(),
+            rate_limiter=get_rate_limiter(),
             temperature=settings.temperature,
             max_tokens=settings.max_tokens
         )
 
+    def _configure(self, response_format: Optional[Type[T]], **params) -> Any:
+        """
+        Bind per-request params, on the structured runnable when a schema is given.
+
+        with_structured_output on a bound runnable rebuilds from the unbound model
+        and drops the bound params (temperature, max_tokens, seed), so it goes first.
+        """
+        llm = self.llm
+        if response_format is not None:
+            llm = llm.with_structured_output(response_format)
+        return llm.bind(**params)
+
     @traceable(name="llm_generate")
     async def generate_async(
         self,
-        messages: List[Dict[str, str]],
+        messages: List[Dict[str, Any]],
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
         response_format: Optional[Type[T]] = None,
+        model: Optional[str] = None,
         **kwargs
     ) -> str | T:
         """
@@ -69,41 +87,32 @@ class LLMClient:
 
         Args:
             messages: List of message dicts with 'role' and 'content'
+                (content may be a string or a list of content blocks)
             temperature: Sampling temperature
             max_tokens: Maximum tokens to generate
             response_format: Optional Pydantic model for structured output
+            model: Per-call model override (defaults to the client's model)
             **kwargs: Additional parameters for the API
 
         Returns:
             Either a string response or a Pydantic model instance
         """
-        temperature = temperature or settings.temperature
+        temperature = temperature if temperature is not None else settings.temperature
         max_tokens = max_tokens or settings.max_tokens
+        if settings.llm_seed is not None:
+            kwargs.setdefault("seed", settings.llm_seed)
+
+        lc_messages = _to_langchain_messages(messages)
 
-        # Convert dict messages to LangChain messages
-        lc_messages = []
-        for msg in messages:
-            role = msg["role"]
-            content = msg["content"]
-            if role == "system":
-                lc_messages.append(SystemMessage(content=content))
-            elif role == "user":
-                lc_messages.append(HumanMessage(content=content))
-            elif role == "assistant":
-                lc_messages.append(AIMessage(content=content))
+        if model and model != self.model_name:
+            kwargs["model"] = model
 
         try:
             # Configure LLM for this request
-            llm = self.llm.bind(
-                temperature=temperature,
-                max_tokens=max_tokens,
-                **kwargs
+            llm = self._configure(
+                response_format, temperature=temperature, max_tokens=max_tokens, **kwargs
             )
 
-            # Handle structured output
-            if response_format is not None:
-                llm = llm.with_structured_output(response_format)
-
             # Invoke LLM
             response = await llm.ainvoke(lc_messages)
 
@@ -117,17 +126,177 @@ class LLMClient:
             else:
                 content = str(response)
 
-            # Clean content
-            if content:
-                try:
-                    content = content.encode('utf-8', errors='ignore').decode('utf-8', errors='ignore')
-                except Exception:
-                    content = content.replace('\udcd1', '').replace('\udcd0', '')
+            return _clean_content(content)
+
+        except Exception as e:
+            logger.error(f"Error generating response: {e}")
+            raise
+
+    @traceable(name="llm_generate_batch")
+    async def generate_batch_async(
+        self,
+        messages_list: List[List[Dict[str, Any]]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        response_format: Optional[Type[T]] = None,
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        **kwargs
+    ) -> List[str | T | Exception]:
+        """
+        Generate responses for several conversations in one batch.
+
+        vLLM's OpenAI-compatible server has no synchronous multi-conversation
+        endpoint, so the requests are dispatched concurrently through one bound
+        runnable and the server's continuous batching schedules them together.
+
+        Args:
+            messages_list: One message list per conversation
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate per conversation
+            response_format: Optional Pydantic model for structured output
+            max_concurrency: Max requests in flight (default: all at once)
+            timeout: Per-request timeout in seconds; a hung request fails alone
+            **kwargs: Additional parameters for the API
+
+        Returns:
+            Results in input order; a failed item is returned as its exception
+        """
+        if not messages_list:
+            return []
+
+        temperature = temperature if temperature is not None else settings.temperature
+        max_tokens = max_tokens or settings.max_tokens
+        if settings.llm_seed is not None:
+            kwargs.setdefault("seed", settings.llm_seed)
+
+        if settings.llm_batch_aiohttp:
+            return await self._generate_batch_aiohttp(
+                messages_list, temperature, max_tokens, response_format, max_concurrency,
+                timeout, **kwargs
+            )
+
+        llm = self._configure(
+            response_format, temperature=temperature, max_tokens=max_tokens, **kwargs
+        )
+        semaphore = asyncio.Semaphore(max_concurrency or len(messages_list))
+
+        async def _invoke(messages: List[Dict[str, Any]]) -> Any:
+            async with semaphore:
+                return await asyncio.wait_for(
+                    llm.ainvoke(_to_langchain_messages(messages)), timeout
+                )
 
+        responses = await asyncio.gather(
+            *(_invoke(messages) for messages in messages_list), return_exceptions=True
+        )
+
+        results: List[str | T | Exception] = []
+        for response in responses:
+            if isinstance(response, Exception) or response_format is not None:
+                results.append(response)
+            elif isinstance(response, AIMessage):
+                results.append(_clean_content(response.content))
+            else:
+                results.append(_clean_content(str(response)))
+
+        failed = sum(isinstance(r, Exception) for r in results)
+        if failed:
+            logger.warning("Batch generation: %d/%d requests failed", failed, len(results))
+        return results
+
+    async def _generate_batch_aiohttp(
+        self,
+        messages_list: List[List[Dict[str, Any]]],
+        temperature: float,
+        max_tokens: int,
+        response_format: Optional[Type[T]],
+        max_concurrency: Optional[int],
+        timeout: Optional[float],
+        **kwargs
+    ) -> List[str | T | Exception]:
+        """generate_batch_async over a raw aiohttp session (no LangChain/httpx per request)."""
+        session = await get_aiohttp_session()
+        request_options: Dict[str, Any] = {}
+        if timeout is not None:
+            import aiohttp
+
+            request_options["timeout"] = aiohttp.ClientTimeout(total=timeout)
+        url = f"{self.base_url.rstrip('/')}/chat/completions"
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        body_base: Dict[str, Any] = {
+            "model": self.model_name,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            **kwargs,
+        }
+        if response_format is not None:
+            body_base["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": response_format.__name__,
+                    "schema": response_format.model_json_schema(),
+                },
+            }
+        semaphore = asyncio.Semaphore(max_concurrency or len(messages_list))
+        rate_limiter = get_rate_limiter()
+
+        async def _post(messages: List[Dict[str, Any]]) -> str | T:
+            async with semaphore:
+                if rate_limiter is not None:
+                    await rate_limiter.aacquire()
+                async with session.post(
+                    url, json={**body_base, "messages": messages}, headers=headers,
+                    **request_options
+                ) as resp:
+                    resp.raise_for_status()
+                    payload = await resp.json()
+            content = _clean_content(payload["choices"][0]["message"]["content"] or "")
+            if response_format is not None:
+                return response_format.model_validate_json(content)
             return content
 
+        results = await asyncio.gather(
+            *(_post(messages) for messages in messages_list), return_exceptions=True
+        )
+        failed = sum(isinstance(r, Exception) for r in results)
+        if failed:
+            logger.warning("Batch generation (aiohttp): %d/%d requests failed", failed, len(results))
+        return results
+
+    async def stream_async(
+        self,
+        messages: List[Dict[str, Any]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        Stream a text response token by token.
+
+        Same arguments as generate_async (without structured output).
+
+        Yields:
+            Content chunks as they arrive from the server
+        """
+        temperature = temperature if temperature is not None else settings.temperature
+        max_tokens = max_tokens or settings.max_tokens
+        if settings.llm_seed is not None:
+            kwargs.setdefault("seed", settings.llm_seed)
+
+        llm = self.llm.bind(
+            temperature=temperature,
+            max_tokens=max_tokens,
+            **kwargs
+        )
+
+        try:
+            async for chunk in llm.astream(_to_langchain_messages(messages)):
+                content = chunk.content if isinstance(chunk.content, str) else str(chunk.content)
+                if content:
+                    yield _clean_content(content)
         except Exception as e:
-            logger.error(f"Error generating response: {e}")
+            logger.error(f"Error streaming response: {e}")
             raise
 
     def get_langchain_llm(self) -> ChatOpenAI:
@@ -135,8 +304,124 @@ class LLMClient:
         return self.llm
 
 
-# Global client instance
+def _to_langchain_messages(messages: List[Dict[str, Any]]) -> List[Any]:
+    """Convert dict messages to LangChain messages."""
+    lc_messages = []
+    for msg in messages:
+        role = msg["role"]
+        content = msg["content"]
+        if role == "system":
+            lc_messages.append(SystemMessage(content=content))
+        elif role == "user":
+            lc_messages.append(HumanMessage(content=content))
+        elif role == "assistant":
+            lc_messages.append(AIMessage(content=content))
+    return lc_messages
+
+
+def _clean_content(content: str) -> str:
+    """Drop invalid surrogates the server occasionally emits in Cyrillic text."""
+    if content:
+        try:
+            content = content.encode('utf-8', errors='ignore').decode('utf-8', errors='ignore')
+        except Exception:
+            content = content.replace('\udcd1', '').replace('\udcd0', '')
+    return content
+
+
+def system_message(content: str) -> Dict[str, Any]:
+    """
+    Build a system message for a static prompt.
+
+    Static prompts must stay byte-identical across calls so the provider can reuse
+    the cached prefix. With settings.llm_cache_control the text is sent as a content
+    block marked with cache_control (Anthropic); otherwise as a plain string, which
+    OpenAI and vLLM prefix caching pick up automatically.
+    """
+    if settings.llm_cache_control:
+        return {
+            "role": "system",
+            "content": [
+                {"type": "text", "text": content, "cache_control": {"type": "ephemeral"}}
+            ],
+        }
+    return {"role": "system", "content": content}
+
+
+# Global client instances
 _llm_client: Optional[LLMClient] = None
+_http_async_client: Optional[httpx.AsyncClient] = None
+_aiohttp_session = None
+_rate_limiter: Optional[InMemoryRateLimiter] = None
+
+
+def get_http_async_client() -> httpx.AsyncClient:
+    """
+    Get or create the shared pooled HTTP client for LLM requests.
+
+    One keep-alive pool for every LLMClient, so requests from all nodes reuse
+    open connections instead of paying a TCP/TLS handshake.
+    """
+    global _http_async_client
+    if _http_async_client is None:
+        _http_async_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.llm_max_connections,
+                max_keepalive_connections=settings.llm_max_keepalive_connections,
+            ),
+            timeout=httpx.Timeout(120.0, connect=10.0),
+            http2=True,
+        )
+    return _http_async_client
+
+
+def get_rate_limiter() -> Optional[InMemoryRateLimiter]:
+    """
+    Get or create the shared token-bucket rate limiter for LLM requests.
+
+    Paces requests to the provider's quota (settings.llm_rate_limit_rps) instead
+    of hitting 429s and backing off; None when the limit is disabled.
+    """
+    global _rate_limiter
+    if _rate_limiter is None and settings.llm_rate_limit_rps > 0:
+        _rate_limiter = InMemoryRateLimiter(
+            requests_per_second=settings.llm_rate_limit_rps,
+            check_every_n_seconds=0.05,
+            max_bucket_size=settings.llm_rate_limit_burst,
+        )
+    return _rate_limiter
+
+
+async def get_aiohttp_session():
+    """
+    Get or create the shared aiohttp session for llm_batch_aiohttp.
+
+    aiohttp is imported lazily: it is only needed when the option is enabled.
+    """
+    global _aiohttp_session
+    if _aiohttp_session is None or _aiohttp_session.closed:
+        import aiohttp
+
+        _aiohttp_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=settings.llm_max_connections * 2,
+                limit_per_host=settings.llm_max_connections,
+                keepalive_timeout=75,
+            ),
+            timeout=aiohttp.ClientTimeout(total=120.0, connect=10.0),
+        )
+    return _aiohttp_session
+
+
+async def close_http_async_client() -> None:
+    """Close the shared HTTP clients (application shutdown)."""
+    global _http_async_client, _aiohttp_session
+    if _http_async_client is not None:
+        await _http_async_client.aclose()
+        _http_async_client = None
+    if _aiohttp_session is not None:
+        await _aiohttp_session.close()
+        _aiohttp_session = None
 
 
 def get_llm_client() -> LLMClient:
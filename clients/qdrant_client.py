@@ -1,6 +1,8 @@
+import asyncio
 import logging
 import uuid
-from typing import Any, Dict, List, Optional
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 from qdrant_client import AsyncQdrantClient
 from qdrant_client.http import models as qmodels
@@ -16,6 +18,30 @@ _DISTANCE_MAP = {
     "euclid": qmodels.Distance.EUCLID,
 }
 
+# Qdrant's default optimizer indexing_threshold (KB), restored after a bulk insert
+_DEFAULT_INDEXING_THRESHOLD = 20000
+
+# Bulk inserts in flight per collection (whole process): indexing resumes when the last one ends
+_indexing_pauses: Dict[str, int] = {}
+_indexing_pause_lock = asyncio.Lock()
+
+# Payload fields used in filters; without an index Qdrant falls back to a full scan.
+_PAYLOAD_INDEXES = {
+    "is_relevant": qmodels.PayloadSchemaType.BOOL,
+    "record_id": qmodels.PayloadSchemaType.KEYWORD,
+}
+
+
+def _scalar_quantization_config() -> qmodels.ScalarQuantization:
+    """int8 copies of the vectors kept in RAM; originals stay on disk for rescoring."""
+    return qmodels.ScalarQuantization(
+        scalar=qmodels.ScalarQuantizationConfig(
+            type=qmodels.ScalarType.INT8,
+            quantile=settings.qdrant_quantization_quantile,
+            always_ram=True,
+        )
+    )
+
 
 class QdrantClient:
     """
@@ -67,16 +93,80 @@ class QdrantClient:
                 self.vector_size,
                 distance,
             )
+            quantization_config = None
+            if settings.qdrant_scalar_quantization:
+                quantization_config = _scalar_quantization_config()
             await self._client.create_collection(
                 collection_name=self.collection,
                 vectors_config=qmodels.VectorParams(
                     size=self.vector_size,
                     distance=distance,
+                    on_disk=settings.qdrant_scalar_quantization,
                 ),
+                quantization_config=quantization_config,
             )
+            info = None
+
+        await self._ensure_payload_indexes(info)
+        await self._ensure_quantization(info)
+        await self._ensure_indexing(info)
 
         return self
 
+    async def _ensure_payload_indexes(self, info: Optional[Any]) -> None:
+        """
+        Create keyword/bool payload indexes for filtered fields if they are missing.
+        """
+        existing = set((info.payload_schema or {}).keys()) if info is not None else set()
+        for field_name, field_schema in _PAYLOAD_INDEXES.items():
+            if field_name in existing:
+                continue
+            try:
+                await self._client.create_payload_index(
+                    collection_name=self.collection,
+                    field_name=field_name,
+                    field_schema=field_schema,
+                )
+                logger.info("Created payload index '%s' on '%s'", field_name, self.collection)
+            except Exception as e:
+                logger.warning("Failed to create payload index '%s': %s", field_name, e)
+
+    async def _ensure_quantization(self, info: Optional[Any]) -> None:
+        """
+        Enable int8 scalar quantization on an existing collection created without it.
+
+        The server quantizes the stored vectors in the background.
+        """
+        if info is None or not settings.qdrant_scalar_quantization:
+            return
+        if info.config.quantization_config is not None:
+            return
+        try:
+            await self._client.update_collection(
+                collection_name=self.collection,
+                quantization_config=_scalar_quantization_config(),
+            )
+            logger.info("Enabled scalar quantization on '%s'", self.collection)
+        except Exception as e:
+            logger.warning("Failed to enable scalar quantization: %s", e)
+
+    async def _ensure_indexing(self, info: Optional[Any]) -> None:
+        """
+        Resume HNSW indexing left paused by a bulk insert that never finished (crash).
+        """
+        if info is None or info.config.optimizer_config.indexing_threshold != 0:
+            return
+        try:
+            await self._client.update_collection(
+                collection_name=self.collection,
+                optimizers_config=qmodels.OptimizersConfigDiff(
+                    indexing_threshold=_DEFAULT_INDEXING_THRESHOLD
+                ),
+            )
+            logger.warning("Resumed indexing left paused on '%s'", self.collection)
+        except Exception as e:
+            logger.warning("Failed to resume indexing: %s", e)
+
     async def close(self):
         if self._client:
             await self._client.close()
@@ -91,6 +181,32 @@ class QdrantClient:
             return uuid.uuid4()
         return uuid.uuid5(uuid.NAMESPACE_URL, record_id)
 
+    @staticmethod
+    def _build_point(
+        vector: List[float],
+        fact: str,
+        message_id: str,
+        is_relevant: bool,
+        brief_fact: Optional[str] = None,
+        payload: Optional[Dict[str, Any]] = None,
+    ) -> qmodels.PointStruct:
+        """Build a point with a new UUID4 id and the record metadata as payload."""
+        base_payload = {
+            "fact": fact,
+            "message_id": message_id,
+            "is_relevant": is_relevant,
+        }
+        if brief_fact:
+            base_payload["brief_fact"] = brief_fact
+        if payload:
+            base_payload.update(payload)
+
+        return qmodels.PointStruct(
+            id=uuid.uuid4(),
+            vector=vector,
+            payload=base_payload,
+        )
+
     async def insert_record(
         self,
         vector: List[float],
@@ -111,29 +227,61 @@ class QdrantClient:
             brief_fact: Brief extracted fact (optional)
             payload: Additional metadata
         """
-        if self._client is None:
-            raise RuntimeError("QdrantClient not initialized. Call initialize() first.")
-
-        point_id = uuid.uuid4()
-        base_payload = {
+        await self.insert_records([{
+            "vector": vector,
             "fact": fact,
             "message_id": message_id,
             "is_relevant": is_relevant,
-        }
-        if brief_fact:
-            base_payload["brief_fact"] = brief_fact
-        if payload:
-            base_payload.update(payload)
+            "brief_fact": brief_fact,
+            "payload": payload,
+        }])
+
+    async def insert_records(self, records: List[Dict[str, Any]], wait: bool = True) -> None:
+        """
+        Insert several records with a single upsert request.
+
+        Args:
+            records: Dicts with the keyword arguments of insert_record
+            wait: Wait until the points are applied (searchable) before returning
+        """
+        if self._client is None:
+            raise RuntimeError("QdrantClient not initialized. Call initialize() first.")
+
+        if not records:
+            return
+
+        points = [self._build_point(**record) for record in records]
+        await self._client.upsert(collection_name=self.collection, points=points, wait=wait)
+
+    @asynccontextmanager
+    async def indexing_paused(self) -> AsyncIterator[None]:
+        """
+        Pause HNSW indexing for a bulk insert spanning several upserts.
+
+        The server stores the raw vectors and builds the graph in one optimizer
+        pass after indexing is resumed, instead of mutating it per point.
+        Overlapping bulk inserts share one pause: the first pauses indexing,
+        the last restores _DEFAULT_INDEXING_THRESHOLD.
+        """
+        if self._client is None:
+            raise RuntimeError("QdrantClient not initialized. Call initialize() first.")
 
-        await self._client.upsert(
+        async with _indexing_pause_lock:
+            if not _indexing_pauses.get(self.collection):
+                await self._set_indexing_threshold(0)
+            _indexing_pauses[self.collection] = _indexing_pauses.get(self.collection, 0) + 1
+        try:
+            yield
+        finally:
+            async with _indexing_pause_lock:
+                _indexing_pauses[self.collection] -= 1
+                if not _indexing_pauses[self.collection]:
+                    await self._set_indexing_threshold(_DEFAULT_INDEXING_THRESHOLD)
+
+    async def _set_indexing_threshold(self, threshold: int) -> None:
+        await self._client.update_collection(
             collection_name=self.collection,
-            points=[
-                qmodels.PointStruct(
-                    id=point_id,
-                    vector=vector,
-                    payload=base_payload,
-                )
-            ],
+            optimizers_config=qmodels.OptimizersConfigDiff(indexing_threshold=threshold),
         )
 
     async def set_relevance_by_message_id(self, record_id: str, is_relevant: bool) -> None:
@@ -161,7 +309,7 @@ class QdrantClient:
 
         point_ids = [point.id for point in scroll_result[0]] if scroll_result else []
         if not point_ids:
-            logger.warning("No Qdrant points found for messageid=%s", message_id)
+            logger.warning("No Qdrant points found for record_id=%s", record_id)
             return
 
         await self._client.set_payload(
@@ -172,21 +320,35 @@ class QdrantClient:
 
     async def set_relevance_by_record_id(self, record_id: str, is_relevant: bool) -> None:
         """Update is_relevant for a point using its Qdrant point ID directly."""
+        await self.set_relevance_by_record_ids([record_id], is_relevant)
+
+    async def set_relevance_by_record_ids(self, record_ids: List[str], is_relevant: bool) -> List[str]:
+        """
+        Update is_relevant for several points in a single set_payload request.
+
+        Returns the record_ids that were updated (invalid UUIDs are skipped).
+        """
         if self._client is None:
             raise RuntimeError("QdrantClient not initialized. Call initialize() first.")
 
-        try:
-            # Convert string record_id to UUID (assuming it's already a valid UUID string from Qdrant)
-            point_id = uuid.UUID(record_id)
-        except (ValueError, AttributeError) as e:
-            logger.error(f"Invalid UUID format for record_id={record_id}: {e}")
-            return
+        valid_ids: List[str] = []
+        point_ids: List[uuid.UUID] = []
+        for record_id in record_ids:
+            try:
+                point_ids.append(uuid.UUID(record_id))
+                valid_ids.append(record_id)
+            except (ValueError, AttributeError) as e:
+                logger.error(f"Invalid UUID format for record_id={record_id}: {e}")
+
+        if not point_ids:
+            return []
 
         await self._client.set_payload(
             collection_name=self.collection,
             payload={"is_relevant": is_relevant},
-            points=[point_id],
+            points=point_ids,
         )
+        return valid_ids
 
     async def search_similar(
         self,
@@ -212,7 +374,16 @@ class QdrantClient:
                 ]
             )
 
-        
+        search_params = None
+        if settings.qdrant_scalar_quantization:
+            # Rescore the oversampled quantized candidates with original vectors
+            search_params = qmodels.SearchParams(
+                quantization=qmodels.QuantizationSearchParams(
+                    rescore=True,
+                    oversampling=settings.qdrant_quantization_oversampling,
+                )
+            )
+
         results = await self._client.query_points(
             collection_name=self.collection,
             query=query_vector,
@@ -220,6 +391,7 @@ class QdrantClient:
             with_payload=True,
             with_vectors=False,
             query_filter=search_filter,
+            search_params=search_params,
         )
 
         hits = results.points if hasattr(results, "points") else results
@@ -241,3 +413,26 @@ class QdrantClient:
                 mapped_results.append({"id": hit[0], "score": hit[1], "payload": None, "fact": None, "brief_fact": None, "message_id": None})
 
         return mapped_results
+
+
+# Global client instance (one connection pool shared by all nodes)
+_qdrant: Optional[QdrantClient] = None
+_qdrant_lock = asyncio.Lock()
+
+
+async def get_qdrant() -> QdrantClient:
+    """Get or create the global initialized Qdrant client."""
+    global _qdrant
+    if _qdrant is None:
+        async with _qdrant_lock:
+            if _qdrant is None:
+                _qdrant = await QdrantClient().initialize()
+    return _qdrant
+
+
+async def close_qdrant() -> None:
+    """Close the global Qdrant client (application shutdown)."""
+    global _qdrant
+    if _qdrant is not None:
+        await _qdrant.close()
+        _qdrant = None
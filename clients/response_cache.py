@@ -0,0 +1,111 @@
+"""
+In-process cache for LLM completions of repeated prompts.
+
+Keys are blake2b digests of the prompt material. Entries expire after a TTL
+and the least recently used entry is evicted once the cache is full.
+"""
+
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional, Tuple, TypeVar
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class ResponseCache:
+    """Bounded LRU cache with TTL for LLM completions."""
+
+    def __init__(self, max_size: Optional[int] = None, ttl: Optional[int] = None):
+        self.max_size = max_size or settings.response_cache_size
+        self.ttl = ttl or settings.response_cache_ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    @staticmethod
+    def make_key(key_material: str) -> str:
+        """Hash prompt material into a cache key."""
+        return hashlib.blake2b(
+            key_material.encode("utf-8", errors="ignore"), digest_size=16
+        ).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return cached value or None if missing/expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store value, evicting the least recently used entry if full."""
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Global cache instance
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Get or create the global response cache."""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
+
+
+async def cached_generate(key_material: str, generator: Callable[[], Awaitable[T]]) -> T:
+    """
+    Return a cached completion for key_material or call generator and cache its result.
+
+    Exceptions from generator are propagated and never cached; cache errors
+    fall back to a live call.
+
+    Args:
+        key_material: Everything the completion depends on (node name, prompt inputs)
+        generator: Coroutine factory performing the LLM call on a miss
+
+    Returns:
+        Cached or freshly generated completion
+    """
+    if not settings.response_cache_enabled:
+        return await generator()
+
+    try:
+        cache = get_response_cache()
+        key = cache.make_key(key_material)
+        cached = cache.get(key)
+    except Exception as e:
+        logger.warning(f"Response cache lookup failed, calling LLM: {e}")
+        return await generator()
+
+    if cached is not None:
+        logger.debug("Response cache hit: %s", key[:12])
+        return cached
+
+    value = await generator()
+    try:
+        cache.set(key, value)
+    except Exception as e:
+        logger.warning(f"Response cache store failed: {e}")
+    return value
@@ -0,0 +1,173 @@
+"""
+In-process semantic cache for LLM completions.
+
+Two tiers: an exact lookup on the prompt material (shared ResponseCache) and,
+on a miss, a cosine-similarity lookup over embeddings of previous inputs, so
+paraphrased inputs reuse an earlier completion. Each use site gets its own
+named cache so completions of different prompts never mix.
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+import numpy as np
+
+from clients.response_cache import cached_generate
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+def _normalize(vector: List[float]) -> np.ndarray:
+    """Scale vector to unit length (float32) so a dot product is the cosine similarity."""
+    array = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(array)
+    if norm == 0:
+        return array
+    return array / norm
+
+
+class SemanticCache:
+    """
+    Bounded LRU cache with TTL, looked up by embedding similarity.
+
+    Unit vectors live in a preallocated float32 matrix of max_size rows (slots),
+    so a lookup is a single matrix-vector product and an insert writes one row
+    in place instead of copying the matrix.
+    """
+
+    def __init__(
+        self,
+        threshold: Optional[float] = None,
+        max_size: Optional[int] = None,
+        ttl: Optional[int] = None,
+    ):
+        self.threshold = threshold or settings.semantic_cache_threshold
+        self.max_size = max_size or settings.semantic_cache_size
+        self.ttl = ttl or settings.response_cache_ttl
+        # Allocated on the first set, once the embedding dimension is known;
+        # a free slot has expiry -inf so it never matches
+        self._matrix: Optional[np.ndarray] = None
+        self._expires = np.full(self.max_size, -np.inf)
+        self._free_slots: List[int] = list(range(self.max_size - 1, -1, -1))
+        # slot -> value, in LRU order
+        self._entries: "OrderedDict[int, Any]" = OrderedDict()
+
+    def get(self, vector: List[float]) -> Optional[Any]:
+        """Return the value of the most similar entry above threshold, or None."""
+        if not self._entries:
+            return None
+
+        live = self._expires >= time.monotonic()
+        for slot in [slot for slot in self._entries if not live[slot]]:
+            self._free(slot)
+
+        query = _normalize(vector)
+        if not self._entries or query.shape[0] != self._matrix.shape[1]:
+            return None
+
+        scores = np.where(live, self._matrix @ query, -np.inf)
+        slot = int(scores.argmax())
+        best_score = float(scores[slot])
+        if best_score < self.threshold:
+            return None
+
+        self._entries.move_to_end(slot)
+        logger.debug("Semantic cache hit (cosine=%.3f)", best_score)
+        return self._entries[slot]
+
+    def set(self, vector: List[float], value: Any) -> None:
+        """Store value under vector, evicting the least recently used entry if full."""
+        unit = _normalize(vector)
+        if self._matrix is None or unit.shape[0] != self._matrix.shape[1]:
+            # First entry, or the embedding model changed: old vectors are not comparable
+            self.clear()
+            self._matrix = np.zeros((self.max_size, unit.shape[0]), dtype=np.float32)
+
+        if not self._free_slots:
+            self._free(next(iter(self._entries)))
+
+        slot = self._free_slots.pop()
+        self._matrix[slot] = unit
+        self._expires[slot] = time.monotonic() + self.ttl
+        self._entries[slot] = value
+
+    def _free(self, slot: int) -> None:
+        """Drop the entry in slot and return the slot to the free list."""
+        del self._entries[slot]
+        self._expires[slot] = -np.inf
+        self._free_slots.append(slot)
+
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        self._expires.fill(-np.inf)
+        self._free_slots = list(range(self.max_size - 1, -1, -1))
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Global named cache instances
+_semantic_caches: Dict[str, SemanticCache] = {}
+
+
+def get_semantic_cache(name: str, threshold: Optional[float] = None) -> SemanticCache:
+    """Get or create the semantic cache for a use site (threshold applies on creation)."""
+    cache = _semantic_caches.get(name)
+    if cache is None:
+        cache = _semantic_caches[name] = SemanticCache(threshold=threshold)
+    return cache
+
+
+async def semantic_cached_generate(
+    name: str,
+    text: str,
+    embed: Callable[[], Awaitable[List[float]]],
+    generator: Callable[[], Awaitable[T]],
+    threshold: Optional[float] = None,
+) -> T:
+    """
+    Return a cached completion for text (exact or paraphrase) or call generator.
+
+    The embedding is only computed on an exact-cache miss. Exceptions from
+    generator are propagated and never cached; semantic cache errors fall back
+    to a live call.
+
+    Args:
+        name: Cache name of the use site (e.g. "brief_fact")
+        text: Input the completion depends on
+        embed: Coroutine factory returning the embedding of text
+        generator: Coroutine factory performing the LLM call on a miss
+        threshold: Cosine similarity for a hit (default: settings.semantic_cache_threshold)
+
+    Returns:
+        Cached or freshly generated completion
+    """
+    if not settings.semantic_cache_enabled:
+        return await cached_generate(f"{name}\n{text}", generator)
+
+    async def _semantic_generate() -> T:
+        try:
+            cache = get_semantic_cache(name, threshold)
+            vector = await embed()
+            cached = cache.get(vector)
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup failed, calling LLM: {e}")
+            return await generator()
+
+        if cached is not None:
+            return cached
+
+        value = await generator()
+        try:
+            cache.set(vector, value)
+        except Exception as e:
+            logger.warning(f"Semantic cache store failed: {e}")
+        return value
+
+    return await cached_generate(f"{name}\n{text}", _semantic_generate)
@@ -121,7 +121,7 @@ def calculate_embedding_cost(
     input_price = pricing.get("input", 0.0)
     cost = (tokens / 1_000_000) * input_price
 
-    logger.debug(f"Embedding cost: {model} - {tokens} tokens (${cost:.6f})")
+    logger.debug("Embedding cost: %s - %s tokens ($%.6f)", model, tokens, cost)
 
     return cost
 
@@ -173,7 +173,7 @@ def add_cost_to_span(
             current_span.set_attribute("llm.pricing.input_per_million", TOKEN_PRICES.get(model, {}).get("input", 0.0))
             current_span.set_attribute("llm.pricing.output_per_million", TOKEN_PRICES.get(model, {}).get("output", 0.0))
 
-            logger.debug(f"Added cost tracking to span: ${cost:.6f}")
+            logger.debug("Added cost tracking to span: $%.6f", cost)
         else:
             logger.debug("No active span to add cost info")
 
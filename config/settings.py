@@ -31,14 +31,67 @@ class Settings(BaseSettings):
         default="lapa",
         description="Model name/path for Lapa LLM"
     )
+    brief_fact_model: Optional[str] = Field(
+        default=None,
+        description="Smaller/faster model for brief fact summaries (defaults to model_name)"
+    )
+    brief_fact_max_input_chars: int = Field(
+        default=2048,
+        description="Message prefix length sent to the brief fact summary (bounds prompt tokens)"
+    )
     temperature: float = Field(
         default=0.001,
         description="Temperature for LLM generation"
     )
+    answer_temperature: float = Field(
+        default=0.0,
+        description="Temperature for grounded answer/extraction calls (0 = deterministic, cacheable)"
+    )
+    llm_seed: Optional[int] = Field(
+        default=42,
+        description="Fixed sampling seed sent with every LLM request (None to omit)"
+    )
+    llm_max_connections: int = Field(
+        default=64,
+        description="Connection pool size of the shared HTTP client used for LLM requests"
+    )
+    llm_max_keepalive_connections: int = Field(
+        default=32,
+        description="Idle keep-alive connections kept open to the LLM server"
+    )
+    llm_batch_aiohttp: bool = Field(
+        default=False,
+        description="Send generate_batch_async requests straight to /chat/completions over an "
+                    "aiohttp session instead of the LangChain/httpx stack (high fan-out)"
+    )
+    llm_rate_limit_rps: float = Field(
+        default=0.0,
+        description="Token-bucket limit on LLM requests per second (provider RPM / 60; 0 = disabled)"
+    )
+    llm_rate_limit_burst: int = Field(
+        default=10,
+        description="Token-bucket capacity: requests that may be sent at once after an idle period"
+    )
     max_tokens: int = Field(
         default=2048,
         description="Maximum tokens for LLM responses"
     )
+    prompt_few_shot: bool = Field(
+        default=True,
+        description="Include few-shot examples in the classifier/extraction system prompts "
+                    "(disable once the compact schema-only prompts are validated)"
+    )
+    llm_cache_control: bool = Field(
+        default=False,
+        description="Mark static system prompts with Anthropic-style cache_control blocks "
+                    "(OpenAI/vLLM cache identical prefixes automatically)"
+    )
+    llm_warmup_on_startup: bool = Field(
+        default=True,
+        description="Send a 1-token request per static system prompt and a short request per "
+                    "structured-output schema at startup to prime the backend prefix (KV) "
+                    "and grammar caches"
+    )
 
     # Qdrant Configuration
     qdrant_url: str = Field(
@@ -57,6 +110,22 @@ class Settings(BaseSettings):
         default="cosine",
         description="Vector distance metric: cosine | dot | euclid"
     )
+    qdrant_scalar_quantization: bool = Field(
+        default=True,
+        description="Keep int8 quantized vectors in RAM, original vectors on disk (new collections)"
+    )
+    qdrant_quantization_quantile: float = Field(
+        default=0.99,
+        description="Quantile of vector values used as the int8 range (clips outliers for precision)"
+    )
+    qdrant_quantization_oversampling: float = Field(
+        default=2.0,
+        description="Oversampling factor for rescoring quantized search results"
+    )
+    qdrant_bulk_insert_threshold: int = Field(
+        default=256,
+        description="Memory updates per message from which index_raw pauses HNSW indexing for the whole insert"
+    )
 
     # SQLite Database Configuration
     database_path: str = Field(
@@ -78,6 +147,18 @@ class Settings(BaseSettings):
         default="text-embedding-qwen",
         description="Embedding model name"
     )
+    embedding_batching: bool = Field(
+        default=True,
+        description="Coalesce concurrent single-text embedding calls into one request"
+    )
+    embedding_batch_window_ms: float = Field(
+        default=0.0,
+        description="Extra time to wait for more texts before sending a batch (0 = same event-loop tick)"
+    )
+    embedding_batch_max_size: int = Field(
+        default=32,
+        description="Maximum number of texts per coalesced embedding request"
+    )
     embedding_dimension: int = Field(
         default=768,
         description="Dimension of embedding vectors"
@@ -103,6 +184,80 @@ class Settings(BaseSettings):
         description="LangSmith project name"
     )
 
+    # Response cache Configuration
+    response_cache_enabled: bool = Field(
+        default=True,
+        description="Cache LLM completions for repeated identical prompts (in-process)"
+    )
+    response_cache_size: int = Field(
+        default=1024,
+        description="Maximum number of cached LLM completions"
+    )
+    response_cache_ttl: int = Field(
+        default=3600,
+        description="Time-to-live for cached LLM completions, seconds"
+    )
+    semantic_cache_enabled: bool = Field(
+        default=True,
+        description="Reuse completions of paraphrased inputs by embedding similarity"
+    )
+    semantic_cache_threshold: float = Field(
+        default=0.97,
+        description="Cosine similarity at or above which a cached completion is reused"
+    )
+    query_analysis_semantic_cache: bool = Field(
+        default=False,
+        description="Reuse query_analyzer plans for paraphrased questions (off: exact-match cache only)"
+    )
+    query_analysis_cache_threshold: float = Field(
+        default=0.92,
+        description="Semantic cache threshold for query_analyzer plans (with query_analysis_semantic_cache)"
+    )
+    semantic_cache_size: int = Field(
+        default=256,
+        description="Maximum number of entries per semantic cache"
+    )
+
+    # Conflict check Configuration
+    conflict_similarity_low: float = Field(
+        default=0.55,
+        description="Cosine similarity below which neighbours are never treated as conflicts (LLM skipped)"
+    )
+    conflict_check_concurrency: int = Field(
+        default=8,
+        description="Maximum number of memory updates checked for conflicts concurrently"
+    )
+
+    # Solve path Configuration
+    parallel_query_analysis: bool = Field(
+        default=False,
+        description="Generate search queries from the user message concurrently with the plan "
+                    "instead of from the finished plan (one LLM round-trip instead of two)"
+    )
+    fused_solve_answer: bool = Field(
+        default=True,
+        description="Return the direct answer together with the context answer (structured output) "
+                    "instead of a separate extraction LLM call"
+    )
+
+    solve_extract_min_chars: int = Field(
+        default=400,
+        description="Answers shorter than this (and with at most 3 sentences) are returned "
+                    "as-is without the extraction LLM call (0 = always extract)"
+    )
+    answer_context_top_k: int = Field(
+        default=8,
+        description="Max number of relevant context items (by retrieval score) put into the answer prompt"
+    )
+    answer_context_item_chars: int = Field(
+        default=1200,
+        description="Per-item character cap for context in the answer prompt"
+    )
+    answer_context_max_chars: int = Field(
+        default=8000,
+        description="Hard character budget for the whole context block of the answer prompt"
+    )
+
     # ReAct Configuration
     max_react_iterations: int = Field(
         default=3,
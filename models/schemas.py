@@ -271,6 +271,18 @@ class SolveResponse(BaseModel):
     )
 
 
+class ContextAnswer(BaseModel):
+    """Відповідь на основі контексту разом з прямою короткою відповіддю."""
+
+    answer: str = Field(
+        description="Повна відповідь на основі контексту з посиланнями [джерело: X]"
+    )
+    direct_answer: str = Field(
+        description="ТІЛЬКИ пряма коротка відповідь на запитання без зайвої інформації, "
+                    "зі збереженням посилань [джерело: X]"
+    )
+
+
 class ContextRelevanceItem(BaseModel):
     """Оценка релевантности одного элемента контекста."""
 
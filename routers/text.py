@@ -35,8 +35,8 @@ async def process_text(request: TextRequest) -> TextResponse:
         HTTPException: If agent processing fails
     """
     time_start = datetime.now()
-    logger.info(f"Processing text request: uid={request.uid}, user={request.user_id}")
-    logger.info(f"Message: {request.text[:100]}...")
+    logger.info("Processing text request: uid=%s, user=%s", request.uid, request.user_id)
+    logger.debug("Message: %s...", request.text[:100])
     
     try:
         # Get agent instance
@@ -61,7 +61,7 @@ async def process_text(request: TextRequest) -> TextResponse:
             config={"configurable": {"thread_id": request.uid}}
         )
         
-        logger.info(f"Agent completed: intent={result.get('intent')}")
+        logger.info("Agent completed: intent=%s", result.get('intent'))
         
         # Extract response
         response_text = result.get("response", "")
@@ -73,15 +73,15 @@ async def process_text(request: TextRequest) -> TextResponse:
             logger.error("Agent returned empty response")
             raise ValueError("Agent returned empty response")
         
-        logger.info(f"Returning response with {len(references)} references")
+        logger.info("Returning response with %d references", len(references))
         time_end = datetime.now()
-        logger.info(f"Processing time: {time_end - time_start}")
+        logger.info("Processing time: %s", time_end - time_start)
         result = TextResponse(
             response=response_text,
             references=references,
             reasoning=""
         )
-        logger.info(f"Returning response: {result}")
+        logger.debug("Returning response: %s", result)
         return result
         
     except Exception as e:
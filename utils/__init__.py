@@ -1,5 +1,5 @@
 """Utilities for the agent."""
 
-from .langsmith_setup import setup_langsmith
+from .langsmith_setup import flush_langsmith, setup_langsmith
 
-__all__ = ["setup_langsmith"]
\ No newline at end of file
+__all__ = ["setup_langsmith", "flush_langsmith"]
\ No newline at end of file
@@ -18,7 +18,23 @@ def setup_langsmith():
         if settings.langchain_api_key:
             os.environ["LANGCHAIN_API_KEY"] = settings.langchain_api_key
         os.environ["LANGCHAIN_PROJECT"] = settings.langchain_project
+        # Export traces from a background thread instead of the request path
+        os.environ["LANGCHAIN_CALLBACKS_BACKGROUND"] = "true"
         print(f"✅ LangSmith tracing enabled for project: {settings.langchain_project}")
     else:
         # Ensure tracing is disabled
-        os.environ["LANGCHAIN_TRACING_V2"] = "false"
\ No newline at end of file
+        os.environ["LANGCHAIN_TRACING_V2"] = "false"
+
+
+def flush_langsmith():
+    """
+    Flush traces still queued for background export.
+
+    Call this on application shutdown so buffered runs are not lost.
+    """
+    if not settings.langchain_tracing_v2:
+        return
+
+    from langsmith.run_trees import get_cached_client
+
+    get_cached_client().flush()
\ No newline at end of file